@@ -2,27 +2,143 @@
 FastAPI endpoint for infrastructure inspection.
 """
 
-from fastapi import APIRouter, File, UploadFile, HTTPException
-from fastapi.responses import JSONResponse
+import io
+import os
+from typing import List
 
-from backend.app.schemas.inspection import InspectionResponse, ErrorResponse
+from fastapi import APIRouter, Depends, File, Request, UploadFile, HTTPException
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from backend.app.schemas.inspection import (
+    InspectionResponse,
+    ErrorResponse,
+    INSPECTION_RESPONSE_ADAPTER,
+    BATCH_INSPECTION_RESPONSE_ADAPTER
+)
 from backend.app.services.inspection import InspectionService
 
 
 router = APIRouter()
 
-# Initialize inspection service (singleton)
-inspection_service = None
+# Upload limits (bytes)
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Maximum number of images in one /inspect_batch request
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", "16"))
+
+
+def create_inspection_service() -> InspectionService:
+    """
+    Build the inspection service, loading and warming up its models.
+
+    Called once per worker process from the application lifespan.
+    """
+    # Initialize with rule-based explanations by default (faster)
+    # Set use_vlm=True to enable BLIP-2 (slower but more detailed)
+    return InspectionService(use_vlm=False)
+
+
+def get_inspection_service(request: Request) -> InspectionService:
+    """
+    Get the inspection service created at application startup.
+    """
+    return request.app.state.inspection_service
+
+
+async def read_upload(file: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> memoryview:
+    """
+    Read an uploaded file in chunks into a single buffer, enforcing a size cap.
+
+    Args:
+        file: Uploaded file
+        max_bytes: Maximum accepted size in bytes
+
+    Returns:
+        View over the uploaded bytes (no extra copy)
+
+    Raises:
+        HTTPException: 413 if the upload exceeds max_bytes
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum upload size is {max_bytes // (1024 * 1024)} MB."
+    )
 
+    if file.size is not None and file.size > max_bytes:
+        raise too_large
 
-def get_inspection_service() -> InspectionService:
-    """Get or create inspection service instance."""
-    global inspection_service
-    if inspection_service is None:
-        # Initialize with rule-based explanations by default (faster)
-        # Set use_vlm=True to enable BLIP-2 (slower but more detailed)
-        inspection_service = InspectionService(use_vlm=False)
-    return inspection_service
+    buffer = io.BytesIO()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise too_large
+        buffer.write(chunk)
+
+    return buffer.getbuffer()
+
+
+async def read_request_body(request: Request, max_bytes: int = MAX_UPLOAD_BYTES) -> memoryview:
+    """
+    Read a raw (possibly chunked) request body into a single buffer, enforcing a size cap.
+
+    Args:
+        request: Incoming request
+        max_bytes: Maximum accepted size in bytes
+
+    Returns:
+        View over the body bytes (no extra copy)
+
+    Raises:
+        HTTPException: 413 if the body exceeds max_bytes
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum upload size is {max_bytes // (1024 * 1024)} MB."
+    )
+
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        raise too_large
+
+    buffer = io.BytesIO()
+    async for chunk in request.stream():
+        if buffer.tell() + len(chunk) > max_bytes:
+            raise too_large
+        buffer.write(chunk)
+
+    return buffer.getbuffer()
+
+
+async def read_image_upload(file: UploadFile) -> memoryview:
+    """
+    Validate an uploaded image and read its bytes.
+
+    Args:
+        file: Uploaded image file
+
+    Returns:
+        View over the uploaded bytes
+
+    Raises:
+        HTTPException: 400 for non-image or empty uploads, 413 if too large
+    """
+    # Validate file type
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid file type: {file.content_type}. Please upload an image file."
+        )
+
+    # Read image bytes (bounded by MAX_UPLOAD_BYTES)
+    image_bytes = await read_upload(file)
+
+    if len(image_bytes) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="Empty file uploaded"
+        )
+
+    return image_bytes
 
 
 @router.post(
@@ -31,6 +147,7 @@ def get_inspection_service() -> InspectionService:
     responses={
         200: {"model": InspectionResponse},
         400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
         500: {"model": ErrorResponse}
     },
     summary="Inspect infrastructure image for defects",
@@ -43,46 +160,105 @@ def get_inspection_service() -> InspectionService:
     3. Generate engineering explanations
     4. Provide recommended actions
 
-    Accepts: JPEG, PNG images
+    Accepts: JPEG, PNG images (up to 20 MB by default, see MAX_UPLOAD_BYTES)
     Returns: Structured inspection report in JSON format
     """
 )
 async def inspect_image(
-    file: UploadFile = File(..., description="Infrastructure image to inspect")
+    file: UploadFile = File(..., description="Infrastructure image to inspect"),
+    service: InspectionService = Depends(get_inspection_service)
 ):
     """
     Perform structural defect inspection on uploaded image.
 
     Args:
         file: Uploaded image file (JPEG, PNG)
+        service: Shared inspection service
 
     Returns:
         InspectionResponse with detected defects and analysis
     """
+    try:
+        image_bytes = await read_image_upload(file)
+
+        # Perform inspection
+        result = await service.inspect_image(image_bytes)
+
+        # The result is already a validated model; serialize it once to JSON bytes
+        return Response(
+            content=INSPECTION_RESPONSE_ADAPTER.dump_json(result),
+            media_type="application/json"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Log error in production
+        print(f"Inspection error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Inspection failed: {str(e)}"
+        )
+
+
+@router.post(
+    "/inspect_raw",
+    response_model=InspectionResponse,
+    responses={
+        200: {"model": InspectionResponse},
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Inspect an image sent as the raw request body",
+    description="""
+    Same analysis as /inspect, but the image is the request body itself
+    (Content-Type: image/jpeg or image/png) instead of a multipart form.
+    The body may use chunked transfer encoding, so producers that do not
+    know the image size up front (e.g. camera feeds) can send it as it
+    is produced.
+    """
+)
+async def inspect_raw(
+    request: Request,
+    service: InspectionService = Depends(get_inspection_service)
+):
+    """
+    Perform structural defect inspection on an image sent as the request body.
+
+    Args:
+        request: Request whose body is the image
+        service: Shared inspection service
+
+    Returns:
+        InspectionResponse with detected defects and analysis
+    """
+    content_type = request.headers.get("content-type", "")
+
     # Validate file type
-    if not file.content_type.startswith("image/"):
+    if not content_type.startswith("image/"):
         raise HTTPException(
             status_code=400,
-            detail=f"Invalid file type: {file.content_type}. Please upload an image file."
+            detail=f"Invalid content type: {content_type}. Send an image as the request body."
         )
 
     try:
-        # Read image bytes
-        image_bytes = await file.read()
+        # Read image bytes as they arrive (bounded by MAX_UPLOAD_BYTES)
+        image_bytes = await read_request_body(request)
 
         if len(image_bytes) == 0:
             raise HTTPException(
                 status_code=400,
-                detail="Empty file uploaded"
+                detail="Empty request body"
             )
 
-        # Get inspection service
-        service = get_inspection_service()
-
         # Perform inspection
         result = await service.inspect_image(image_bytes)
 
-        return result
+        return Response(
+            content=INSPECTION_RESPONSE_ADAPTER.dump_json(result),
+            media_type="application/json"
+        )
 
     except HTTPException:
         raise
@@ -95,6 +271,135 @@ async def inspect_image(
         )
 
 
+@router.post(
+    "/inspect_stream",
+    response_class=StreamingResponse,
+    responses={
+        200: {"content": {"application/x-ndjson": {}}},
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Inspect infrastructure image, streaming the report as NDJSON",
+    description="""
+    Same analysis as /inspect, returned as newline-delimited JSON: one
+    DefectDetection object per line, followed by a final summary line
+    (status, total_defects, summary). Detection lines are sent as soon as
+    their explanations are ready (per VLM batch when the VLM is enabled),
+    and the response is never gzip-compressed. Uploads that cannot be
+    decoded or inspected fail with an error status like /inspect; errors
+    while explanations are streaming are reported as a final
+    {"status": "error", ...} line.
+    """
+)
+async def inspect_stream(
+    file: UploadFile = File(..., description="Infrastructure image to inspect"),
+    service: InspectionService = Depends(get_inspection_service)
+):
+    """
+    Perform structural defect inspection, streaming results line by line.
+
+    Args:
+        file: Uploaded image file (JPEG, PNG)
+        service: Shared inspection service
+
+    Returns:
+        StreamingResponse of NDJSON lines
+    """
+    image_bytes = await read_image_upload(file)
+
+    try:
+        # Decode, detect and assess before any response is sent, so bad
+        # uploads fail with a proper status code
+        results = await service.inspect_image_stream(image_bytes)
+    except Exception as e:
+        # Log error in production
+        print(f"Inspection error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Inspection failed: {str(e)}"
+        )
+
+    async def lines():
+        try:
+            async for item in results:
+                yield item.model_dump_json().encode() + b"\n"
+        except Exception as e:
+            # Log error in production
+            print(f"Inspection error: {str(e)}")
+            error = ErrorResponse(message="Inspection failed", detail=str(e))
+            yield error.model_dump_json().encode() + b"\n"
+
+    # Tell reverse proxies (nginx) not to buffer the stream
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/inspect_batch",
+    response_model=List[InspectionResponse],
+    responses={
+        200: {"model": List[InspectionResponse]},
+        400: {"model": ErrorResponse},
+        413: {"model": ErrorResponse},
+        500: {"model": ErrorResponse}
+    },
+    summary="Inspect several infrastructure images in one request",
+    description="""
+    Upload several infrastructure images under the repeated `files` field.
+
+    The images are inspected together, sharing detector forward passes,
+    and one inspection report is returned per image in upload order.
+
+    Accepts: up to 16 images by default (see MAX_BATCH_FILES)
+    Returns: JSON array of inspection reports
+    """
+)
+async def inspect_batch(
+    files: List[UploadFile] = File(..., description="Infrastructure images to inspect"),
+    service: InspectionService = Depends(get_inspection_service)
+):
+    """
+    Perform structural defect inspection on several uploaded images.
+
+    Args:
+        files: Uploaded image files (JPEG, PNG)
+        service: Shared inspection service
+
+    Returns:
+        List of InspectionResponse, one per uploaded image
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files. Maximum batch size is {MAX_BATCH_FILES}."
+        )
+
+    try:
+        images_bytes = [await read_image_upload(file) for file in files]
+
+        # Perform inspections
+        results = await service.inspect_images(images_bytes)
+
+        return Response(
+            content=BATCH_INSPECTION_RESPONSE_ADAPTER.dump_json(results),
+            media_type="application/json"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        # Log error in production
+        print(f"Batch inspection error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Inspection failed: {str(e)}"
+        )
+
+
 @router.get(
     "/health",
     summary="Health check endpoint",
@@ -2,10 +2,40 @@
 FastAPI main application for Infrastructure Inspection System.
 """
 
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+from backend.app.api.inspect import router as inspect_router, create_inspection_service
+
+
+# Streamed responses must reach the client line by line, so they are never compressed
+GZIP_EXCLUDED_PATHS = frozenset({"/api/inspect_stream"})
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    """GZip middleware that passes responses for excluded paths through unbuffered."""
 
-from backend.app.api.inspect import router as inspect_router
+    def __init__(self, app, exclude_paths=frozenset(), **kwargs):
+        super().__init__(app, **kwargs)
+        self.exclude_paths = exclude_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load and warm up models before accepting requests; stop background work at shutdown."""
+    app.state.inspection_service = create_inspection_service()
+    yield
+    await app.state.inspection_service.aclose()
 
 
 # Create FastAPI application
@@ -24,7 +54,8 @@ app = FastAPI(
     """,
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS for frontend access
@@ -36,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON reports for clients that accept gzip (small responses are sent as-is)
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=1000, exclude_paths=GZIP_EXCLUDED_PATHS)
+
 # Include routers
 app.include_router(inspect_router, prefix="/api", tags=["Inspection"])
 
@@ -62,10 +96,16 @@ if __name__ == "__main__":
     print("Infrastructure Inspection System - Starting Server")
     print("=" * 60)
 
+    # A single auto-reloading process by default; setting WORKERS opts in to
+    # multiple processes (each loads its own models) so CPU-bound inference
+    # is not serialized
+    workers = os.getenv("WORKERS")
+
     uvicorn.run(
         "backend.app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
+        reload=not workers,
+        workers=int(workers) if workers else None,
         log_level="info"
     )
@@ -3,12 +3,25 @@ YOLOv8-based defect detection module for infrastructure inspection.
 Detects cracks, corrosion, and spalling in images.
 """
 
+import asyncio
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
 import torch
-from ultralytics import YOLO
 from PIL import Image
 import numpy as np
+import cv2
+
+
+# Images are PIL Images or HWC uint8 arrays in BGR channel order (OpenCV/Ultralytics convention)
+ImageInput = Union[Image.Image, np.ndarray]
+
+
+def image_size(image: ImageInput) -> Tuple[int, int]:
+    """Return (width, height) of a PIL Image or HWC array."""
+    if isinstance(image, np.ndarray):
+        return image.shape[1], image.shape[0]
+    return image.size
 
 
 class DefectDetector:
@@ -21,32 +34,180 @@ class DefectDetector:
     - Spalling
     """
 
-    def __init__(self, model_path: str = None, confidence_threshold: float = 0.25):
+    def __init__(
+        self,
+        model_path: str = None,
+        confidence_threshold: float = 0.25,
+        imgsz: int = 640,
+        half: Optional[bool] = None
+    ):
         """
         Initialize the defect detector.
 
+        Set USE_ONNX=1 to run inference through ONNX Runtime instead of
+        PyTorch (ONNX_INT8=0 disables INT8 quantization of the exported model),
+        USE_TORCHSCRIPT=1 to run a frozen TorchScript export of the model, or
+        USE_OPENVINO=1 to run an OpenVINO export on Intel CPUs
+        (OPENVINO_INT8_DATA=<dataset yaml> enables INT8 calibration).
+
         Args:
             model_path: Path to YOLOv8 weights. If None, uses pretrained YOLOv8n.
             confidence_threshold: Minimum confidence for detections.
+            imgsz: Model input size in pixels.
+            half: Run PyTorch inference in FP16. Defaults to True when CUDA is available.
         """
         self.confidence_threshold = confidence_threshold
+        self.imgsz = imgsz
+        self.half = torch.cuda.is_available() if half is None else half
         self.class_names = {0: "crack", 1: "corrosion", 2: "spalling"}
+        self._defect_labels = np.array([self.class_names[i] for i in range(len(self.class_names))])
+
+        # Imported here so importing this module (e.g. for CLI tooling) stays cheap
+        from ultralytics import YOLO
 
         # Load YOLOv8 model
         # For MVP, we use pretrained YOLOv8n as a placeholder
         # In production, this would be fine-tuned on defect dataset
         if model_path and Path(model_path).exists():
-            self.model = YOLO(model_path)
+            self.weights_path = model_path
         else:
             # Use pretrained model as placeholder for MVP
-            self.model = YOLO("yolov8n.pt")
+            self.weights_path = "yolov8n.pt"
+        self.model = YOLO(self.weights_path)
+        self.model.model.eval()
+
+        # Limit intra-op threads so concurrent requests don't oversubscribe the CPU
+        torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", min(4, os.cpu_count() or 1))))
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set once per process, before any inter-op work
+            pass
+
+        # Optional ONNX Runtime backend
+        self.session = None
+        self._onnx_input = None
+        self._io_binding = None
+        self._device_inputs = {}
+        if os.getenv("USE_ONNX", "0") == "1":
+            self._load_onnx_session()
+        elif os.getenv("USE_TORCHSCRIPT", "0") == "1":
+            self._load_torchscript()
+        elif os.getenv("USE_OPENVINO", "0") == "1":
+            self._load_openvino()
+
+    def _load_onnx_session(self):
+        """
+        Export the YOLOv8 weights to ONNX (once) and load them into ONNX Runtime.
+
+        On CPU the exported graph is dynamically quantized to INT8 unless
+        ONNX_INT8=0. When the CUDA execution provider is available, the FP32
+        graph runs on the GPU with inputs and outputs bound to device memory.
+        """
+        import onnxruntime as ort
+
+        use_cuda = "CUDAExecutionProvider" in ort.get_available_providers()
+
+        onnx_path = Path(self.weights_path).with_suffix(".onnx")
+        if not onnx_path.exists():
+            onnx_path = Path(self.model.export(format="onnx", imgsz=self.imgsz, dynamic=True, simplify=True))
+
+        # Dynamically quantized ConvInteger ops only run on the CPU provider
+        if not use_cuda and os.getenv("ONNX_INT8", "1") == "1":
+            int8_path = onnx_path.with_name(f"{onnx_path.stem}_int8.onnx")
+            if not int8_path.exists():
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(str(onnx_path), str(int8_path), weight_type=QuantType.QUInt8)
+            onnx_path = int8_path
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        providers = ["CPUExecutionProvider"]
+        if use_cuda:
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.session = ort.InferenceSession(
+            str(onnx_path),
+            sess_options=sess_options,
+            providers=providers
+        )
+        self.onnx_input_name = self.session.get_inputs()[0].name
+        self.onnx_output_name = self.session.get_outputs()[0].name
+
+        if use_cuda:
+            self._io_binding = self.session.io_binding()
+
+    def _load_torchscript(self):
+        """
+        Export the YOLOv8 weights to a frozen TorchScript module (once) and
+        run inference through it instead of the eager model.
+        """
+        from ultralytics import YOLO
+
+        torchscript_path = Path(self.weights_path).with_suffix(".torchscript")
+
+        if not torchscript_path.exists():
+            torchscript_path = Path(self.model.export(format="torchscript", imgsz=self.imgsz))
+
+            # Freeze the traced module, keeping the metadata Ultralytics stores alongside it
+            extra_files = {"config.txt": ""}
+            module = torch.jit.load(str(torchscript_path), _extra_files=extra_files)
+            module = torch.jit.freeze(module.eval())
+            torch.jit.save(module, str(torchscript_path), _extra_files=extra_files)
+
+        self.model = YOLO(str(torchscript_path), task="detect")
+        # Frozen weights are baked-in FP32 constants that .half() cannot cast,
+        # so FP16 inputs would mismatch them
+        self.half = False
+
+    def _load_openvino(self):
+        """
+        Export the YOLOv8 weights to OpenVINO IR (once) and run inference
+        through the OpenVINO CPU runtime instead of the eager model.
+
+        If OPENVINO_INT8_DATA points to an Ultralytics dataset yaml, the export
+        is post-training quantized to INT8 using that data for calibration;
+        otherwise FP32 weights are kept.
+        """
+        from ultralytics import YOLO
+
+        calibration_data = os.getenv("OPENVINO_INT8_DATA")
+        weights = Path(self.weights_path)
+        suffix = "_int8_openvino_model" if calibration_data else "_openvino_model"
+        openvino_path = weights.with_name(weights.stem + suffix)
+
+        if not openvino_path.exists():
+            export_args = {"format": "openvino", "imgsz": self.imgsz, "half": False}
+            if calibration_data:
+                export_args.update(int8=True, data=calibration_data)
+            openvino_path = Path(self.model.export(**export_args))
 
-    def detect(self, image: Image.Image) -> List[Dict[str, Any]]:
+        self.model = YOLO(str(openvino_path), task="detect")
+        # OpenVINO picks its own CPU precision; FP16 inputs are not supported here
+        self.half = False
+
+    def warmup(self, runs: int = 2):
+        """
+        Run dummy inferences so the first real request does not pay one-time
+        initialization costs. TorchScript's profiling executor is disabled
+        during warmup to avoid its slow first optimization passes.
+
+        Args:
+            runs: Number of warmup inferences
+        """
+        dummy = np.full((self.imgsz, self.imgsz, 3), 114, dtype=np.uint8)
+
+        with torch.jit.optimized_execution(False):
+            for _ in range(runs):
+                self.detect(dummy)
+
+    def detect(self, image: ImageInput) -> List[Dict[str, Any]]:
         """
         Detect defects in the given image.
 
         Args:
-            image: PIL Image to analyze
+            image: PIL Image or BGR image array to analyze
 
         Returns:
             List of detections, each containing:
@@ -55,74 +216,378 @@ class DefectDetector:
                 - bbox: [x1, y1, x2, y2] bounding box coordinates
                 - bbox_normalized: normalized coordinates [0-1]
         """
-        # Run inference
-        results = self.model(image, conf=self.confidence_threshold, verbose=False)
+        return self.detect_batch([image])[0]
+
+    def detect_batch(self, images: List[ImageInput]) -> List[List[Dict[str, Any]]]:
+        """
+        Detect defects in several images, with one model call per distinct
+        input size (a single call when all images share a size).
+
+        Args:
+            images: PIL Images or BGR image arrays to analyze
+
+        Returns:
+            One list of detections per input image, in input order.
+            See detect() for the detection format.
+        """
+        # Shrink large images to the model input size up front; boxes are
+        # mapped back to original coordinates in _build_detections
+        inputs = [self._resize_to_input(image) for image in images]
+
+        if self.session is not None:
+            with torch.inference_mode():
+                predictions = self._predict_onnx(inputs)
+
+            batch_detections = []
+
+            for image, model_input, prediction in zip(images, inputs, predictions):
+                batch_detections.append(self._build_detections(
+                    prediction.numpy(), image_size(image), image_size(model_input)
+                ))
+
+            return batch_detections
+
+        # Ultralytics letterboxes a batch of equal-sized images to a minimal
+        # rectangle but pads mixed sizes to a full square, which changes the
+        # detections; run one model call per input size so an image's results
+        # do not depend on what it was batched with
+        groups: Dict[Tuple[int, int], List[int]] = {}
+        for index, model_input in enumerate(inputs):
+            groups.setdefault(image_size(model_input), []).append(index)
+
+        batch_detections: List[List[Dict[str, Any]]] = [[] for _ in images]
+
+        for indices in groups.values():
+            with torch.inference_mode():
+                results = self.model.predict(
+                    [inputs[i] for i in indices],
+                    conf=self.confidence_threshold,
+                    half=self.half,
+                    verbose=False,
+                    save=False,
+                    show=False,
+                    augment=False
+                )
+
+            for i, result in zip(indices, results):
+                boxes = result.boxes
+
+                if boxes is None or len(boxes) == 0:
+                    continue
+
+                # Copy all boxes to the host in one transfer: (N, 6) [x1, y1, x2, y2, conf, cls]
+                batch_detections[i] = self._build_detections(
+                    boxes.data.cpu().numpy(), image_size(images[i]), image_size(inputs[i])
+                )
+
+        return batch_detections
+
+    def _resize_to_input(self, image: ImageInput) -> ImageInput:
+        """
+        Downscale an image so its longest side equals the model input size.
+        Images that already fit are returned unchanged.
+        """
+        width, height = image_size(image)
+        longest = max(width, height)
+
+        if longest <= self.imgsz:
+            return image
+
+        scale = self.imgsz / longest
+        new_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+
+        if isinstance(image, np.ndarray):
+            return cv2.resize(image, new_size, interpolation=cv2.INTER_LINEAR)
+        return image.resize(new_size, Image.BILINEAR)
+
+    def _predict_onnx(self, images: List[ImageInput]) -> List[torch.Tensor]:
+        """
+        Run batched inference through ONNX Runtime.
+
+        The preprocessed batch is written into a reused input buffer, so calls
+        must not overlap (DetectionBatcher runs one batch at a time).
+
+        Args:
+            images: PIL Images or BGR image arrays to analyze
+
+        Returns:
+            One (N, 6) tensor per image with rows [x1, y1, x2, y2, confidence, class_id]
+            in original image coordinates.
+        """
+        from ultralytics.utils import ops
+
+        batch_size = len(images)
+        if self._onnx_input is None or len(self._onnx_input) < batch_size:
+            self._onnx_input = np.empty((batch_size, 3, self.imgsz, self.imgsz), dtype=np.float32)
+        inputs = self._onnx_input[:batch_size]
+
+        shapes = []
+        for i, image in enumerate(images):
+            if isinstance(image, np.ndarray):
+                array = image
+            else:
+                array = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+            shapes.append(array.shape[:2])
+            # HWC BGR uint8 -> CHW RGB float in [0, 1]
+            np.divide(self._letterbox(array)[..., ::-1].transpose(2, 0, 1), 255.0, out=inputs[i])
+
+        if self._io_binding is not None:
+            outputs = self._run_with_io_binding(inputs)
+        else:
+            outputs = self.session.run(None, {self.onnx_input_name: inputs})[0]
+
+        predictions = ops.non_max_suppression(
+            torch.from_numpy(outputs),
+            conf_thres=self.confidence_threshold,
+            iou_thres=0.7
+        )
+
+        # Map boxes from letterboxed input back to original image coordinates
+        for prediction, shape in zip(predictions, shapes):
+            prediction[:, :4] = ops.scale_boxes((self.imgsz, self.imgsz), prediction[:, :4], shape)
+
+        return predictions
+
+    def _run_with_io_binding(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Run the ONNX session on the GPU through IO binding.
 
-        detections = []
+        The input is copied into a device buffer that is allocated once per
+        batch size and reused; the output stays on the device (in ORT's CUDA
+        memory arena) until it is copied back once at the end.
 
-        for result in results:
-            boxes = result.boxes
+        Args:
+            inputs: (B, 3, H, W) float32 input batch
+
+        Returns:
+            Raw model output as a NumPy array
+        """
+        import onnxruntime as ort
+
+        device_input = self._device_inputs.get(inputs.shape)
+        if device_input is None:
+            device_input = ort.OrtValue.ortvalue_from_numpy(inputs, "cuda", 0)
+            self._device_inputs[inputs.shape] = device_input
+        else:
+            device_input.update_inplace(inputs)
+
+        self._io_binding.bind_ortvalue_input(self.onnx_input_name, device_input)
+        self._io_binding.bind_output(self.onnx_output_name, "cuda", 0)
+        self.session.run_with_iobinding(self._io_binding)
+
+        return self._io_binding.copy_outputs_to_cpu()[0]
 
-            if boxes is None or len(boxes) == 0:
-                continue
+    def _letterbox(self, image: np.ndarray) -> np.ndarray:
+        """
+        Resize and pad an HWC image to the square model input, preserving aspect ratio.
+        Matches Ultralytics' letterbox so boxes can be mapped back with ops.scale_boxes.
+        """
+        height, width = image.shape[:2]
+        ratio = min(self.imgsz / height, self.imgsz / width)
+        new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+
+        if (new_width, new_height) != (width, height):
+            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+
+        pad_w = (self.imgsz - new_width) / 2
+        pad_h = (self.imgsz - new_height) / 2
+        top, bottom = int(round(pad_h - 0.1)), int(round(pad_h + 0.1))
+        left, right = int(round(pad_w - 0.1)), int(round(pad_w + 0.1))
 
-            # Get image dimensions for normalization
-            img_height, img_width = image.size[1], image.size[0]
+        return cv2.copyMakeBorder(
+            image, top, bottom, left, right,
+            cv2.BORDER_CONSTANT, value=(114, 114, 114)
+        )
 
-            for box in boxes:
-                # Extract box data
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0].cpu().numpy())
-                class_id = int(box.cls[0].cpu().numpy())
+    def _build_detections(
+        self,
+        data: np.ndarray,
+        image_dims: Tuple[int, int],
+        input_dims: Tuple[int, int]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build detection dicts from a host-side box array.
+
+        Args:
+            data: (N, 6) rows of [x1, y1, x2, y2, confidence, class_id]
+                in model input coordinates
+            image_dims: Original image (width, height)
+            input_dims: (width, height) of the image passed to the model
 
-                # Map class ID to defect type
-                # For MVP with pretrained model, we simulate defect detection
-                # In production, this would use actual trained class IDs
-                class_name = self._map_class_to_defect(class_id)
+        Returns:
+            List of detections in the format described in detect()
+        """
+        xyxy = data[:, :4]
+        confidences = data[:, 4]
+        class_names = self._map_classes_to_defects(data[:, 5].astype(np.int32))
 
-                detection = {
-                    "class_name": class_name,
-                    "confidence": confidence,
-                    "bbox": [float(x1), float(y1), float(x2), float(y2)],
-                    "bbox_normalized": [
-                        float(x1 / img_width),
-                        float(y1 / img_height),
-                        float(x2 / img_width),
-                        float(y2 / img_height)
-                    ]
-                }
+        input_width, input_height = input_dims
+        xyxy_normalized = xyxy / np.array(
+            [input_width, input_height, input_width, input_height], dtype=np.float32
+        )
 
-                detections.append(detection)
+        # Scale boxes back up if the image was downscaled before inference
+        if input_dims != image_dims:
+            img_width, img_height = image_dims
+            xyxy = xyxy_normalized * np.array(
+                [img_width, img_height, img_width, img_height], dtype=np.float32
+            )
 
-        return detections
+        return [
+            {
+                "class_name": class_name,
+                "confidence": confidence,
+                "bbox": bbox,
+                "bbox_normalized": bbox_normalized
+            }
+            for bbox, bbox_normalized, confidence, class_name in zip(
+                xyxy.tolist(), xyxy_normalized.tolist(), confidences.tolist(), class_names
+            )
+        ]
 
-    def _map_class_to_defect(self, class_id: int) -> str:
+    def _map_classes_to_defects(self, class_ids: np.ndarray) -> List[str]:
         """
-        Map YOLOv8 class ID to defect type.
+        Map YOLOv8 class IDs to defect types with a single array lookup.
         For MVP, we use modulo to simulate defect classes.
         In production, this would map actual trained class IDs.
         """
-        defect_types = ["crack", "corrosion", "spalling"]
-        return defect_types[class_id % 3]
+        return self._defect_labels[class_ids % len(self._defect_labels)].tolist()
 
-    def crop_defect_region(self, image: Image.Image, bbox: List[float], padding: int = 20) -> Image.Image:
+    def crop_defect_region(self, image: ImageInput, bbox: List[float], padding: int = 20) -> ImageInput:
         """
         Crop the defect region from the image with optional padding.
 
         Args:
-            image: Original PIL Image
+            image: Original PIL Image or image array
             bbox: Bounding box [x1, y1, x2, y2]
             padding: Pixels to add around the bbox
 
         Returns:
-            Cropped PIL Image
+            Cropped image of the same type as the input (a view for arrays)
         """
         x1, y1, x2, y2 = bbox
+        img_width, img_height = image_size(image)
 
         # Add padding
         x1 = max(0, int(x1 - padding))
         y1 = max(0, int(y1 - padding))
-        x2 = min(image.width, int(x2 + padding))
-        y2 = min(image.height, int(y2 + padding))
+        x2 = min(img_width, int(x2 + padding))
+        y2 = min(img_height, int(y2 + padding))
 
+        if isinstance(image, np.ndarray):
+            return image[y1:y2, x1:x2]
         return image.crop((x1, y1, x2, y2))
+
+
+class DetectionBatcher:
+    """
+    Micro-batching front-end for DefectDetector.
+
+    Concurrent requests submit single images; a background worker collects
+    images arriving within a short window and runs them through the model
+    in one batched call, then hands each request its own detections.
+    """
+
+    def __init__(
+        self,
+        detector: DefectDetector,
+        max_batch_size: Optional[int] = None,
+        max_wait_ms: Optional[float] = None
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            detector: Detector used to run batched inference.
+            max_batch_size: Maximum images per model call (env: YOLO_BATCH_SIZE).
+            max_wait_ms: Time to wait for more images after the first one
+                arrives (env: YOLO_BATCH_WAIT_MS).
+        """
+        self.detector = detector
+        self.max_batch_size = max(1, max_batch_size or int(os.getenv("YOLO_BATCH_SIZE", "8")))
+        if max_wait_ms is None:
+            max_wait_ms = float(os.getenv("YOLO_BATCH_WAIT_MS", "5"))
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def detect(self, image: ImageInput) -> List[Dict[str, Any]]:
+        """
+        Queue an image for batched detection and wait for its results.
+
+        Args:
+            image: PIL Image or BGR image array to analyze
+
+        Returns:
+            List of detections, as returned by DefectDetector.detect()
+        """
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def aclose(self):
+        """
+        Stop the background worker and fail any requests still waiting for results.
+
+        Call at application shutdown; a later detect() starts a new worker.
+        """
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        # Requests queued but not yet picked up by the worker
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Detection batcher closed"))
+
+    async def _run(self):
+        """Worker loop: drain the queue into batches and run inference."""
+        loop = asyncio.get_running_loop()
+        batch = []
+
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+
+                # Collect more images until the batch is full or the window closes
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+
+                images = [image for image, _ in batch]
+
+                try:
+                    # Run the blocking model call off the event loop
+                    results = await loop.run_in_executor(None, self.detector.detect_batch, images)
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for (_, future), detections in zip(batch, results):
+                    if not future.done():
+                        future.set_result(detections)
+        finally:
+            # Requests whose batch was in progress when the worker was cancelled
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Detection batcher closed"))
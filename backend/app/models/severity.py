@@ -7,9 +7,271 @@ from typing import Literal, Dict, Any
 from PIL import Image
 import numpy as np
 
+# Numba is optional; without it the rule kernels run as plain Python/NumPy
+try:
+    import numba
+except ImportError:
+    numba = None
+
 
 SeverityLevel = Literal["Low", "Medium", "High"]
 
+# Defect type codes used by the rule kernels
+CRACK = 0
+CORROSION = 1
+SPALLING = 2
+UNKNOWN = -1
+
+DEFECT_TYPE_CODES = {"crack": CRACK, "corrosion": CORROSION, "spalling": SPALLING}
+
+
+# Rule outcomes per defect type, in the order the rules are evaluated
+CRACK_OUTCOMES = (
+    ("High", "Long crack with significant extent, potential structural concern"),
+    ("High", "Large crack covering substantial area, requires immediate attention"),
+    ("High", "Extensive linear crack, may indicate structural movement"),
+    ("Medium", "Moderate crack requiring monitoring and potential repair"),
+    ("Medium", "Clearly visible crack, should be assessed by engineer"),
+    ("Low", "Small localized crack, likely superficial but should be documented"),
+)
+
+CORROSION_OUTCOMES = (
+    ("High", "Extensive corrosion with likely material degradation, immediate assessment needed"),
+    ("High", "Large corroded area indicating advanced deterioration"),
+    ("Medium", "Moderate corrosion present, risk of progression if untreated"),
+    ("Medium", "Significant corroded area requiring remediation planning"),
+    ("Low", "Surface-level corrosion detected, monitor for progression"),
+)
+
+SPALLING_OUTCOMES = (
+    ("High", "Extensive spalling, possible reinforcement exposure, structural integrity at risk"),
+    ("High", "Large spalled region indicating concrete deterioration, urgent repair required"),
+    ("Medium", "Moderate spalling with material loss, repair recommended"),
+    ("Medium", "Significant surface spalling, assess for underlying damage"),
+    ("Low", "Minor surface spalling detected, document and monitor"),
+)
+
+UNKNOWN_OUTCOME = ("Medium", "Unknown defect type, defaulting to Medium severity")
+
+# Flat outcome table indexed by the batch kernels
+_OUTCOMES = CRACK_OUTCOMES + CORROSION_OUTCOMES + SPALLING_OUTCOMES + (UNKNOWN_OUTCOME,)
+_CORROSION_OFFSET = len(CRACK_OUTCOMES)
+_SPALLING_OFFSET = _CORROSION_OFFSET + len(CORROSION_OUTCOMES)
+_UNKNOWN_INDEX = len(_OUTCOMES) - 1
+
+
+# Crack rule thresholds
+CRACK_LONG_ASPECT_RATIO = 8.0
+CRACK_LONG_RELATIVE_AREA = 0.05
+CRACK_LARGE_RELATIVE_AREA = 0.15
+CRACK_EXTENSIVE_MAX_DIMENSION = 300.0
+CRACK_EXTENSIVE_ASPECT_RATIO = 5.0
+CRACK_MODERATE_RELATIVE_AREA = 0.03
+CRACK_MODERATE_ASPECT_RATIO = 4.0
+CRACK_MODERATE_MAX_DIMENSION = 150.0
+CRACK_VISIBLE_CONFIDENCE = 0.8
+CRACK_VISIBLE_RELATIVE_AREA = 0.01
+
+# Corrosion rule thresholds
+CORROSION_EXTENSIVE_RELATIVE_AREA = 0.12
+CORROSION_LARGE_AREA = 50000.0
+CORROSION_LARGE_CONFIDENCE = 0.7
+CORROSION_MODERATE_RELATIVE_AREA = 0.04
+CORROSION_SIGNIFICANT_AREA = 15000.0
+
+# Spalling rule thresholds
+SPALLING_EXTENSIVE_RELATIVE_AREA = 0.10
+SPALLING_LARGE_AREA = 40000.0
+SPALLING_LARGE_CONFIDENCE = 0.75
+SPALLING_MODERATE_RELATIVE_AREA = 0.03
+SPALLING_SIGNIFICANT_AREA = 10000.0
+
+def _crack_rule(relative_area, max_dimension, aspect_ratio, confidence):
+    """
+    Assess crack severity based on length and extent.
+    Returns the index of the matching entry in CRACK_OUTCOMES.
+
+    Rules:
+    - High: Long cracks (high aspect ratio) or large relative area
+    - Medium: Moderate length/area
+    - Low: Small, localized cracks
+    """
+    # High severity: Long cracks or wide coverage
+    if aspect_ratio > CRACK_LONG_ASPECT_RATIO and relative_area > CRACK_LONG_RELATIVE_AREA:
+        return 0
+    elif relative_area > CRACK_LARGE_RELATIVE_AREA:
+        return 1
+    elif max_dimension > CRACK_EXTENSIVE_MAX_DIMENSION and aspect_ratio > CRACK_EXTENSIVE_ASPECT_RATIO:
+        return 2
+
+    # Medium severity: Moderate cracks
+    elif relative_area > CRACK_MODERATE_RELATIVE_AREA or (
+        aspect_ratio > CRACK_MODERATE_ASPECT_RATIO and max_dimension > CRACK_MODERATE_MAX_DIMENSION
+    ):
+        return 3
+    elif confidence > CRACK_VISIBLE_CONFIDENCE and relative_area > CRACK_VISIBLE_RELATIVE_AREA:
+        return 4
+
+    # Low severity: Small cracks
+    else:
+        return 5
+
+
+def _corrosion_rule(relative_area, area, confidence):
+    """
+    Assess corrosion severity based on area and extent.
+    Returns the index of the matching entry in CORROSION_OUTCOMES.
+
+    Rules:
+    - High: Deep/widespread corrosion indicating material loss
+    - Medium: Moderate surface corrosion
+    - Low: Minor surface oxidation
+    """
+    # High severity: Extensive corrosion
+    if relative_area > CORROSION_EXTENSIVE_RELATIVE_AREA:
+        return 0
+    elif area > CORROSION_LARGE_AREA and confidence > CORROSION_LARGE_CONFIDENCE:
+        return 1
+
+    # Medium severity: Moderate corrosion
+    elif relative_area > CORROSION_MODERATE_RELATIVE_AREA:
+        return 2
+    elif area > CORROSION_SIGNIFICANT_AREA:
+        return 3
+
+    # Low severity: Surface-level corrosion
+    else:
+        return 4
+
+
+def _spalling_rule(relative_area, area, confidence):
+    """
+    Assess spalling severity based on area and depth indicators.
+    Returns the index of the matching entry in SPALLING_OUTCOMES.
+
+    Rules:
+    - High: Large spalling potentially exposing reinforcement
+    - Medium: Moderate surface loss
+    - Low: Minor surface spalling
+    """
+    # High severity: Large spalling areas
+    if relative_area > SPALLING_EXTENSIVE_RELATIVE_AREA:
+        return 0
+    elif area > SPALLING_LARGE_AREA and confidence > SPALLING_LARGE_CONFIDENCE:
+        return 1
+
+    # Medium severity: Moderate spalling
+    elif relative_area > SPALLING_MODERATE_RELATIVE_AREA:
+        return 2
+    elif area > SPALLING_SIGNIFICANT_AREA:
+        return 3
+
+    # Low severity: Minor spalling
+    else:
+        return 4
+
+
+def _rule_indices_loop(type_codes, relative_area, max_dimension, aspect_ratio, area, confidence):
+    """
+    Flat _OUTCOMES index for every detection, one loop iteration per box.
+    Only used when compiled with Numba.
+    """
+    indices = np.empty(type_codes.shape[0], dtype=np.int64)
+
+    for i in range(type_codes.shape[0]):
+        code = type_codes[i]
+        if code == CRACK:
+            indices[i] = _crack_rule(relative_area[i], max_dimension[i], aspect_ratio[i], confidence[i])
+        elif code == CORROSION:
+            indices[i] = _CORROSION_OFFSET + _corrosion_rule(relative_area[i], area[i], confidence[i])
+        elif code == SPALLING:
+            indices[i] = _SPALLING_OFFSET + _spalling_rule(relative_area[i], area[i], confidence[i])
+        else:
+            indices[i] = _UNKNOWN_INDEX
+
+    return indices
+
+
+def _rule_indices_numpy(type_codes, relative_area, max_dimension, aspect_ratio, area, confidence):
+    """
+    Flat _OUTCOMES index for every detection as NumPy array operations.
+    Mirrors the _*_rule cascades (np.select picks the first matching rule).
+    """
+    crack = np.select(
+        [
+            (aspect_ratio > CRACK_LONG_ASPECT_RATIO) & (relative_area > CRACK_LONG_RELATIVE_AREA),
+            relative_area > CRACK_LARGE_RELATIVE_AREA,
+            (max_dimension > CRACK_EXTENSIVE_MAX_DIMENSION) & (aspect_ratio > CRACK_EXTENSIVE_ASPECT_RATIO),
+            (relative_area > CRACK_MODERATE_RELATIVE_AREA)
+            | ((aspect_ratio > CRACK_MODERATE_ASPECT_RATIO) & (max_dimension > CRACK_MODERATE_MAX_DIMENSION)),
+            (confidence > CRACK_VISIBLE_CONFIDENCE) & (relative_area > CRACK_VISIBLE_RELATIVE_AREA),
+        ],
+        np.arange(5),
+        default=5
+    )
+    corrosion = np.select(
+        [
+            relative_area > CORROSION_EXTENSIVE_RELATIVE_AREA,
+            (area > CORROSION_LARGE_AREA) & (confidence > CORROSION_LARGE_CONFIDENCE),
+            relative_area > CORROSION_MODERATE_RELATIVE_AREA,
+            area > CORROSION_SIGNIFICANT_AREA,
+        ],
+        np.arange(4),
+        default=4
+    )
+    spalling = np.select(
+        [
+            relative_area > SPALLING_EXTENSIVE_RELATIVE_AREA,
+            (area > SPALLING_LARGE_AREA) & (confidence > SPALLING_LARGE_CONFIDENCE),
+            relative_area > SPALLING_MODERATE_RELATIVE_AREA,
+            area > SPALLING_SIGNIFICANT_AREA,
+        ],
+        np.arange(4),
+        default=4
+    )
+
+    return np.select(
+        [type_codes == CRACK, type_codes == CORROSION, type_codes == SPALLING],
+        [crack, corrosion + _CORROSION_OFFSET, spalling + _SPALLING_OFFSET],
+        default=_UNKNOWN_INDEX
+    )
+
+
+if numba is not None:
+    _crack_rule = numba.njit(cache=True)(_crack_rule)
+    _corrosion_rule = numba.njit(cache=True)(_corrosion_rule)
+    _spalling_rule = numba.njit(cache=True)(_spalling_rule)
+    _rule_indices = numba.njit(cache=True)(_rule_indices_loop)
+
+    # Compile at import so the first request doesn't pay for it
+    _crack_rule(0.0, 0.0, 0.0, 0.0)
+    _corrosion_rule(0.0, 0.0, 0.0)
+    _spalling_rule(0.0, 0.0, 0.0)
+    _rule_indices(*([np.zeros(1, dtype=np.int64)] + [np.zeros(1)] * 5))
+else:
+    _rule_indices = _rule_indices_numpy
+
+
+def _box_metrics(boxes: np.ndarray, img_area: float) -> tuple[np.ndarray, ...]:
+    """
+    Rule inputs for an (N, 4) array of [x1, y1, x2, y2] boxes.
+
+    Returns:
+        Tuple of (relative_area, max_dimension, aspect_ratio, area) arrays
+    """
+    # Calculate defect dimensions
+    width = boxes[:, 2] - boxes[:, 0]
+    height = boxes[:, 3] - boxes[:, 1]
+    area = width * height
+
+    # Relative metrics
+    relative_area = area / img_area
+    max_dimension = np.maximum(width, height)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aspect_ratio = max_dimension / np.minimum(width, height)
+
+    return relative_area, max_dimension, aspect_ratio, area
+
 
 class SeverityAssessor:
     """
@@ -34,7 +296,7 @@ class SeverityAssessor:
         Args:
             defect_type: Type of defect (crack, corrosion, spalling)
             bbox: Bounding box [x1, y1, x2, y2]
-            image: Original image for size comparison
+            image: Original image (PIL Image or HWC array) for size comparison
             confidence: Detection confidence score
 
         Returns:
@@ -47,117 +309,66 @@ class SeverityAssessor:
         area = width * height
 
         # Get image dimensions for relative sizing
-        img_width, img_height = image.size
+        if isinstance(image, np.ndarray):
+            img_height, img_width = image.shape[:2]
+        else:
+            img_width, img_height = image.size
         img_area = img_width * img_height
 
         # Relative metrics
+        max_dimension = max(width, height)
         relative_area = area / img_area
-        aspect_ratio = max(width, height) / min(width, height)
+        aspect_ratio = max_dimension / min(width, height)
 
         # Assess based on defect type
-        defect_type_lower = defect_type.lower()
-
-        if defect_type_lower == "crack":
-            return self._assess_crack(relative_area, width, height, aspect_ratio, confidence)
-        elif defect_type_lower == "corrosion":
-            return self._assess_corrosion(relative_area, area, confidence)
-        elif defect_type_lower == "spalling":
-            return self._assess_spalling(relative_area, area, confidence)
+        type_code = DEFECT_TYPE_CODES.get(defect_type.lower(), UNKNOWN)
+        if type_code == CRACK:
+            return CRACK_OUTCOMES[_crack_rule(relative_area, max_dimension, aspect_ratio, confidence)]
+        elif type_code == CORROSION:
+            return CORROSION_OUTCOMES[_corrosion_rule(relative_area, area, confidence)]
+        elif type_code == SPALLING:
+            return SPALLING_OUTCOMES[_spalling_rule(relative_area, area, confidence)]
         else:
-            return "Medium", "Unknown defect type, defaulting to Medium severity"
+            return UNKNOWN_OUTCOME
 
-    def _assess_crack(
+    def assess_batch(
         self,
-        relative_area: float,
-        width: float,
-        height: float,
-        aspect_ratio: float,
-        confidence: float
-    ) -> tuple[SeverityLevel, str]:
+        detections: list[Dict[str, Any]],
+        img_width: int,
+        img_height: int
+    ) -> list[tuple[SeverityLevel, str]]:
         """
-        Assess crack severity based on length and extent.
+        Assess severity of all detections in an image at once.
 
-        Rules:
-        - High: Long cracks (high aspect ratio) or large relative area
-        - Medium: Moderate length/area
-        - Low: Small, localized cracks
-        """
-        max_dimension = max(width, height)
+        Applies the same rules as assess_severity() to arrays of box metrics
+        in one kernel call (Numba-compiled when available, NumPy otherwise)
+        instead of one Python call per box.
 
-        # High severity: Long cracks or wide coverage
-        if aspect_ratio > 8 and relative_area > 0.05:
-            return "High", "Long crack with significant extent, potential structural concern"
-        elif relative_area > 0.15:
-            return "High", "Large crack covering substantial area, requires immediate attention"
-        elif max_dimension > 300 and aspect_ratio > 5:
-            return "High", "Extensive linear crack, may indicate structural movement"
-
-        # Medium severity: Moderate cracks
-        elif relative_area > 0.03 or (aspect_ratio > 4 and max_dimension > 150):
-            return "Medium", "Moderate crack requiring monitoring and potential repair"
-        elif confidence > 0.8 and relative_area > 0.01:
-            return "Medium", "Clearly visible crack, should be assessed by engineer"
-
-        # Low severity: Small cracks
-        else:
-            return "Low", "Small localized crack, likely superficial but should be documented"
+        Args:
+            detections: Detections from DefectDetector (class_name, bbox, confidence)
+            img_width: Original image width
+            img_height: Original image height
 
-    def _assess_corrosion(
-        self,
-        relative_area: float,
-        area: float,
-        confidence: float
-    ) -> tuple[SeverityLevel, str]:
+        Returns:
+            List of (severity_level, reasoning) tuples, in detection order
         """
-        Assess corrosion severity based on area and extent.
+        if not detections:
+            return []
 
-        Rules:
-        - High: Deep/widespread corrosion indicating material loss
-        - Medium: Moderate surface corrosion
-        - Low: Minor surface oxidation
-        """
-        # High severity: Extensive corrosion
-        if relative_area > 0.12:
-            return "High", "Extensive corrosion with likely material degradation, immediate assessment needed"
-        elif area > 50000 and confidence > 0.7:
-            return "High", "Large corroded area indicating advanced deterioration"
-
-        # Medium severity: Moderate corrosion
-        elif relative_area > 0.04:
-            return "Medium", "Moderate corrosion present, risk of progression if untreated"
-        elif area > 15000:
-            return "Medium", "Significant corroded area requiring remediation planning"
-
-        # Low severity: Surface-level corrosion
-        else:
-            return "Low", "Surface-level corrosion detected, monitor for progression"
+        # One pass over the detections: (N, 5) rows of [x1, y1, x2, y2, confidence]
+        values = np.array(
+            [(*d["bbox"], d["confidence"]) for d in detections], dtype=np.float64
+        )
+        type_codes = np.fromiter(
+            (DEFECT_TYPE_CODES.get(d["class_name"].lower(), UNKNOWN) for d in detections),
+            dtype=np.int64,
+            count=len(detections)
+        )
 
-    def _assess_spalling(
-        self,
-        relative_area: float,
-        area: float,
-        confidence: float
-    ) -> tuple[SeverityLevel, str]:
-        """
-        Assess spalling severity based on area and depth indicators.
+        outcome = _rule_indices(
+            type_codes,
+            *_box_metrics(values[:, :4], img_width * img_height),
+            values[:, 4]
+        )
 
-        Rules:
-        - High: Large spalling potentially exposing reinforcement
-        - Medium: Moderate surface loss
-        - Low: Minor surface spalling
-        """
-        # High severity: Large spalling areas
-        if relative_area > 0.10:
-            return "High", "Extensive spalling, possible reinforcement exposure, structural integrity at risk"
-        elif area > 40000 and confidence > 0.75:
-            return "High", "Large spalled region indicating concrete deterioration, urgent repair required"
-
-        # Medium severity: Moderate spalling
-        elif relative_area > 0.03:
-            return "Medium", "Moderate spalling with material loss, repair recommended"
-        elif area > 10000:
-            return "Medium", "Significant surface spalling, assess for underlying damage"
-
-        # Low severity: Minor spalling
-        else:
-            return "Low", "Minor surface spalling detected, document and monitor"
+        return [_OUTCOMES[i] for i in outcome.tolist()]
@@ -3,26 +3,138 @@ Vision-Language Model for generating engineering explanations of defects.
 Uses BLIP-2 to analyze cropped defect regions and provide professional assessments.
 """
 
-from typing import Dict, Any
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Mapping, Optional, Tuple
+from functools import lru_cache
+from types import MappingProxyType
 from PIL import Image
+import numpy as np
 import torch
-from transformers import Blip2Processor, Blip2ForConditionalGeneration
 
 
-class VisionLanguageModel:
+# Canned explanations per defect type and severity, shared by every call
+_EXPLANATIONS: Mapping[str, Mapping[str, Dict[str, str]]] = MappingProxyType({
+    "crack": {
+        "High": {
+            "explanation": "Significant linear discontinuity detected in structural element. The crack extent suggests potential load path disruption or material fatigue. Location and propagation pattern indicate need for immediate structural assessment.",
+            "recommended_action": "Conduct detailed structural evaluation including load capacity analysis. Consider temporary shoring if needed. Implement crack monitoring system and develop repair specifications with licensed structural engineer."
+        },
+        "Medium": {
+            "explanation": "Moderate crack formation observed in structural component. The defect exhibits characteristics of early-stage material degradation or settlement-induced stress. Current extent suggests localized rather than systemic issue.",
+            "recommended_action": "Install crack width monitoring gauges. Perform material testing to determine cause. Schedule repair using appropriate epoxy injection or routing and sealing within next maintenance cycle."
+        },
+        "Low": {
+            "explanation": "Minor surface crack detected. Defect appears superficial with limited propagation. Likely caused by shrinkage, thermal stress, or minor settlement. No immediate structural concern evident.",
+            "recommended_action": "Document crack location and dimensions. Apply surface sealant to prevent moisture ingress. Schedule for re-inspection in 6-12 months to monitor for progression."
+        }
+    },
+    "corrosion": {
+        "High": {
+            "explanation": "Advanced corrosion detected with evidence of significant material loss. The deterioration pattern suggests prolonged exposure to corrosive environment. Potential for reduced load-bearing capacity and progressive structural degradation.",
+            "recommended_action": "Immediate structural assessment required. Perform material thickness testing and load capacity evaluation. Implement corrosion protection system. Plan for member replacement or structural reinforcement as engineering analysis dictates."
+        },
+        "Medium": {
+            "explanation": "Moderate corrosion identified on structural surface. Observable oxidation with partial material degradation. Current state indicates active corrosion process requiring intervention to prevent acceleration.",
+            "recommended_action": "Remove corrosion products and assess remaining material thickness. Apply protective coating system per SSPC standards. Improve drainage or ventilation to eliminate moisture source. Monitor quarterly for progression."
+        },
+        "Low": {
+            "explanation": "Surface-level corrosion detected with minimal material loss. Early-stage oxidation present, primarily affecting protective coating or superficial material layers. Structural integrity currently maintained.",
+            "recommended_action": "Clean affected area and apply corrosion inhibitor. Restore protective coating system. Address moisture source if identified. Include in routine inspection schedule."
+        }
+    },
+    "spalling": {
+        "High": {
+            "explanation": "Extensive concrete spalling with visible material loss detected. Defect severity suggests potential reinforcement exposure or advanced deterioration. Pattern indicates freeze-thaw damage, corrosion-induced pressure, or alkali-silica reaction.",
+            "recommended_action": "Urgent engineering assessment required. Remove loose material and inspect for reinforcement corrosion. Perform concrete strength testing. Execute structural repair using compatible materials per ACI 546 guidelines. Address root cause of deterioration."
+        },
+        "Medium": {
+            "explanation": "Moderate spalling observed with measurable concrete delamination. Surface layer failure evident, potentially due to reinforcement corrosion, freeze-thaw cycles, or construction defects. Underlying structure requires verification.",
+            "recommended_action": "Remove delaminated concrete and assess extent of damage. Test for chloride content and carbonation depth. Repair using polymer-modified concrete or appropriate patching material. Implement preventive measures for underlying cause."
+        },
+        "Low": {
+            "explanation": "Minor surface spalling detected affecting concrete cover. Limited material loss observed, likely due to localized impact, minor freeze-thaw action, or finishing issues. Structural reinforcement not compromised.",
+            "recommended_action": "Remove loose material and clean surface. Apply concrete patching compound for affected areas. Seal surface to prevent moisture penetration. Monitor during regular inspections."
+        }
+    }
+})
+
+
+@lru_cache(maxsize=16)
+def _default_explanation(defect_type: str, severity: str) -> Dict[str, str]:
+    """
+    Generic explanation for defect types or severities without a canned entry.
+    """
+    return {
+        "explanation": f"{severity} severity {defect_type} detected requiring engineering assessment.",
+        "recommended_action": "Consult with licensed structural engineer for evaluation and repair recommendations."
+    }
+
+
+def _cpu_supports_bf16() -> bool:
+    """
+    Whether oneDNN has fast BF16 kernels for this CPU (AVX-512 or AMX).
+    Without it PyTorch emulates BF16, which is slower than FP32.
+    """
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+class RuleBasedExplainer:
+    """
+    Rule-based defect explanations, used when the VLM is disabled and as a
+    fallback by the VLM itself.
+    """
+
+    def generate_simple_explanation(
+        self,
+        defect_type: str,
+        severity: str
+    ) -> Dict[str, str]:
+        """
+        Generate rule-based explanation when VLM is unavailable or for faster inference.
+        Fallback method for production scenarios.
+
+        Args:
+            defect_type: Type of defect
+            severity: Severity level
+
+        Returns:
+            Dictionary with explanation and recommended_action (shared, do not mutate)
+        """
+        explanation = _EXPLANATIONS.get(defect_type.lower(), {}).get(severity)
+        if explanation is None:
+            explanation = _default_explanation(defect_type, severity)
+        return explanation
+
+
+class VisionLanguageModel(RuleBasedExplainer):
     """
     BLIP-2 based vision-language model for defect explanation generation.
 
     Generates engineering-grade natural language explanations for detected defects.
     """
 
-    def __init__(self, model_name: str = "Salesforce/blip2-opt-2.7b", device: str = None):
+    def __init__(
+        self,
+        model_name: str = "Salesforce/blip2-opt-2.7b",
+        device: str = None,
+        quantization: Optional[str] = None
+    ):
         """
         Initialize the Vision-Language Model.
 
+        On CUDA, set VLM_VISION_ONNX=1 to run the vision encoder through an
+        ONNX export with ONNX Runtime (TensorRT FP16 when available).
+        VLM_BATCH_SIZE caps the number of defects per generate() call.
+
         Args:
             model_name: Hugging Face model identifier for BLIP-2
             device: Device to run model on ('cuda', 'mps', or 'cpu')
+            quantization: bitsandbytes weight quantization on CUDA: 'int8', 'nf4', or None
         """
         # Auto-detect device if not specified
         if device is None:
@@ -35,19 +147,196 @@ class VisionLanguageModel:
         else:
             self.device = device
 
+        if quantization not in (None, "int8", "nf4"):
+            raise ValueError(f"Unsupported VLM quantization: {quantization}")
+        if quantization and self.device != "cuda":
+            raise ValueError("VLM quantization requires CUDA")
+
+        # Defects per generate() call (two sequences each), bounding activation memory
+        self.max_batch_size = max(1, int(os.getenv("VLM_BATCH_SIZE", "8")))
+        # Serializes _generate_text_batch across request threads
+        self._generate_lock = threading.Lock()
+
         print(f"Loading Vision-Language Model on {self.device}...")
 
+        # Imported here so the default rule-based mode never loads transformers
+        from transformers import Blip2Processor, Blip2ForConditionalGeneration
+
         # Load BLIP-2 processor and model
         self.processor = Blip2Processor.from_pretrained(model_name)
-        self.model = Blip2ForConditionalGeneration.from_pretrained(
-            model_name,
-            torch_dtype=torch.float16 if self.device == "cuda" else torch.float32
-        )
-        self.model.to(self.device)
+        # OPT is decoder-only: pad on the left so batched prompts end where generation starts
+        self.processor.tokenizer.padding_side = "left"
+        # Prompts repeat across requests (defect type x severity x prompt kind)
+        self._prompt_token_ids = lru_cache(maxsize=32)(self._tokenize_prompt)
+
+        # FP16 on CUDA; BF16 on CPUs with native support (halves weight bandwidth,
+        # uses AVX512-BF16/AMX), FP32 elsewhere
+        if self.device == "cuda":
+            torch_dtype = torch.float16
+        elif self.device == "cpu" and _cpu_supports_bf16():
+            torch_dtype = torch.bfloat16
+        else:
+            torch_dtype = torch.float32
+
+        # Quantized weights are placed on the GPU by bitsandbytes at load time
+        load_kwargs = {}
+        if quantization:
+            from transformers import BitsAndBytesConfig
+
+            if quantization == "nf4":
+                quantization_config = BitsAndBytesConfig(
+                    load_in_4bit=True,
+                    bnb_4bit_quant_type="nf4",
+                    bnb_4bit_compute_dtype=torch.float16
+                )
+            else:
+                quantization_config = BitsAndBytesConfig(load_in_8bit=True)
+            load_kwargs = {"quantization_config": quantization_config, "device_map": "auto"}
+
+        # Prefer fused attention kernels; fall back when the installed
+        # transformers/hardware does not support them for this model
+        attn_implementations = ["sdpa", None]
+        if self.device == "cuda":
+            attn_implementations.insert(0, "flash_attention_2")
+
+        for attn_implementation in attn_implementations:
+            kwargs = {"attn_implementation": attn_implementation} if attn_implementation else {}
+            try:
+                self.model = Blip2ForConditionalGeneration.from_pretrained(
+                    model_name,
+                    torch_dtype=torch_dtype,
+                    **kwargs,
+                    **load_kwargs
+                )
+                break
+            except (ValueError, ImportError) as e:
+                print(f"Attention implementation {attn_implementation} unavailable: {e}")
+        if not quantization:
+            self.model.to(self.device)
         self.model.eval()
 
+        if self.device == "cpu":
+            try:
+                import intel_extension_for_pytorch as ipex
+                self.model = ipex.optimize(self.model, dtype=torch_dtype)
+            except ImportError:
+                pass
+
+        if self.device == "cuda" and not quantization:
+            if os.getenv("VLM_VISION_ONNX", "0") == "1":
+                self._load_vision_onnx(model_name)
+            # torch.compile does not trace through bitsandbytes kernels
+            self._compile()
+
         print("Vision-Language Model loaded successfully")
 
+    def _load_vision_onnx(self, model_name: str):
+        """
+        Export the BLIP-2 vision encoder to ONNX (once) and route its forward
+        pass through ONNX Runtime. The encoder sees fixed-size processor
+        output, so it compiles well ahead of time; the language model stays
+        in PyTorch.
+
+        Args:
+            model_name: Hugging Face model identifier, used to name the export
+        """
+        import onnxruntime as ort
+
+        vision_model = self.model.vision_model
+        vision_config = self.model.config.vision_config
+        dtype = self.model.dtype
+        onnx_path = Path(model_name.replace("/", "_") + "_vision.onnx")
+
+        if not onnx_path.exists():
+            dummy_pixel_values = torch.zeros(
+                (1, 3, vision_config.image_size, vision_config.image_size),
+                dtype=dtype,
+                device=self.device
+            )
+            with torch.inference_mode():
+                torch.onnx.export(
+                    vision_model,
+                    (dummy_pixel_values,),
+                    str(onnx_path),
+                    input_names=["pixel_values"],
+                    output_names=["last_hidden_state", "pooler_output"],
+                    dynamic_axes={
+                        "pixel_values": {0: "batch"},
+                        "last_hidden_state": {0: "batch"},
+                        "pooler_output": {0: "batch"}
+                    },
+                    opset_version=17
+                )
+
+        # TensorRT (FP16, engine cached next to the export) > CUDA
+        providers = [
+            ("TensorrtExecutionProvider", {
+                "trt_fp16_enable": True,
+                "trt_engine_cache_enable": True,
+                "trt_engine_cache_path": str(onnx_path.resolve().parent)
+            }),
+            "CUDAExecutionProvider"
+        ]
+        available = ort.get_available_providers()
+        providers = [p for p in providers if (p[0] if isinstance(p, tuple) else p) in available]
+        if not providers:
+            print("ONNX Runtime has no GPU provider, keeping PyTorch vision encoder")
+            return
+
+        session = ort.InferenceSession(str(onnx_path), providers=providers)
+        element_type = np.float16 if dtype == torch.float16 else np.float32
+        sequence_length = (vision_config.image_size // vision_config.patch_size) ** 2 + 1
+        hidden_size = vision_config.hidden_size
+
+        def forward(pixel_values, output_attentions=None, output_hidden_states=None, return_dict=None):
+            from transformers.modeling_outputs import BaseModelOutputWithPooling
+
+            pixel_values = pixel_values.to(dtype).contiguous()
+            batch = pixel_values.shape[0]
+            last_hidden_state = torch.empty(
+                (batch, sequence_length, hidden_size), dtype=dtype, device=self.device
+            )
+            pooler_output = torch.empty((batch, hidden_size), dtype=dtype, device=self.device)
+
+            # Bind torch CUDA buffers directly so activations never leave the GPU
+            binding = session.io_binding()
+            device_id = pixel_values.device.index or 0
+            for bind, name, tensor in (
+                (binding.bind_input, "pixel_values", pixel_values),
+                (binding.bind_output, "last_hidden_state", last_hidden_state),
+                (binding.bind_output, "pooler_output", pooler_output)
+            ):
+                bind(name, "cuda", device_id, element_type, tuple(tensor.shape), tensor.data_ptr())
+
+            # ONNX Runtime runs on its own stream; make sure the inputs are ready
+            torch.cuda.synchronize()
+            session.run_with_iobinding(binding)
+
+            return BaseModelOutputWithPooling(
+                last_hidden_state=last_hidden_state, pooler_output=pooler_output
+            )
+
+        vision_model.forward = forward
+        print(f"Vision encoder running on ONNX Runtime ({session.get_providers()[0]})")
+
+    def _compile(self):
+        """
+        Compile the language model forward pass with torch.compile and pay the
+        compilation cost up front with one warmup generation. Falls back to
+        eager execution if compilation fails.
+        """
+        language_model = self.model.language_model
+        eager_forward = language_model.forward
+
+        try:
+            language_model.forward = torch.compile(
+                eager_forward, mode="reduce-overhead", fullgraph=False, dynamic=True
+            )
+            self.generate_explanation(Image.new("RGB", (224, 224)), "crack", "Medium")
+        except Exception as e:
+            print(f"torch.compile failed, using eager VLM: {e}")
+            language_model.forward = eager_forward
+
     def generate_explanation(
         self,
         image: Image.Image,
@@ -67,20 +356,50 @@ class VisionLanguageModel:
                 - explanation: Technical description of the defect
                 - recommended_action: Engineering recommendation
         """
-        # Create engineering-focused prompts
-        explanation_prompt = self._create_explanation_prompt(defect_type, severity)
-        action_prompt = self._create_action_prompt(defect_type, severity)
+        return self.generate_explanation_batch([image], [defect_type], [severity])[0]
 
-        # Generate explanation
-        explanation = self._generate_text(image, explanation_prompt)
+    def generate_explanation_batch(
+        self,
+        images: List[Image.Image],
+        defect_types: List[str],
+        severities: List[str]
+    ) -> List[Dict[str, str]]:
+        """
+        Generate explanations for several defects, batching up to
+        max_batch_size defects into each generate() call.
 
-        # Generate recommended action
-        recommended_action = self._generate_text(image, action_prompt)
+        Args:
+            images: Cropped images of the defect regions
+            defect_types: Type of each defect
+            severities: Severity level of each defect
 
-        return {
-            "explanation": explanation.strip(),
-            "recommended_action": recommended_action.strip()
-        }
+        Returns:
+            One dictionary per defect, in input order. See generate_explanation().
+        """
+        # Create engineering-focused prompts: an explanation and an action per defect
+        batch_images = []
+        prompts = []
+
+        for image, defect_type, severity in zip(images, defect_types, severities):
+            batch_images.extend((image, image))
+            prompts.append(self._create_explanation_prompt(defect_type, severity))
+            prompts.append(self._create_action_prompt(defect_type, severity))
+
+        # Generate explanations and recommended actions in bounded batched passes
+        texts = []
+        step = 2 * self.max_batch_size
+        for start in range(0, len(prompts), step):
+            texts.extend(self._generate_text_batch(
+                batch_images[start:start + step], prompts[start:start + step]
+            ))
+
+        return [
+            {
+                "explanation": explanation.strip(),
+                "recommended_action": recommended_action.strip()
+            }
+            for explanation, recommended_action in zip(texts[::2], texts[1::2])
+        ]
 
     def _create_explanation_prompt(self, defect_type: str, severity: str) -> str:
         """
@@ -104,106 +423,99 @@ class VisionLanguageModel:
         )
         return f"Question: {base_prompt} Answer:"
 
-    def _generate_text(self, image: Image.Image, prompt: str, max_length: int = 100) -> str:
+    def _tokenize_prompt(self, prompt: str) -> Tuple[int, ...]:
         """
-        Generate text from image and prompt using BLIP-2.
+        Tokenize a text prompt (cached per instance via _prompt_token_ids).
 
         Args:
-            image: PIL Image
             prompt: Text prompt
-            max_length: Maximum length of generated text
 
         Returns:
-            Generated text
+            Token IDs of the prompt
         """
-        # Prepare inputs
-        inputs = self.processor(image, prompt, return_tensors="pt")
+        return tuple(self.processor.tokenizer(prompt)["input_ids"])
 
-        # Move inputs to device
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-        # Generate text
-        with torch.no_grad():
-            generated_ids = self.model.generate(
-                **inputs,
-                max_length=max_length,
-                num_beams=3,
-                temperature=0.7,
-                do_sample=False
-            )
+    def _generate_text(self, image: Image.Image, prompt: str, max_new_tokens: int = 60) -> str:
+        """
+        Generate text from image and prompt using BLIP-2.
 
-        # Decode generated text
-        generated_text = self.processor.batch_decode(generated_ids, skip_special_tokens=True)[0]
+        Args:
+            image: PIL Image
+            prompt: Text prompt
+            max_new_tokens: Maximum number of generated tokens
 
-        return generated_text
+        Returns:
+            Generated text
+        """
+        return self._generate_text_batch([image], [prompt], max_new_tokens)[0]
 
-    def generate_simple_explanation(
+    def _generate_text_batch(
         self,
-        defect_type: str,
-        severity: str
-    ) -> Dict[str, str]:
+        images: List[Image.Image],
+        prompts: List[str],
+        max_new_tokens: int = 60
+    ) -> List[str]:
         """
-        Generate rule-based explanation when VLM is unavailable or for faster inference.
-        Fallback method for production scenarios.
+        Generate text for several image/prompt pairs in one generate() call.
 
         Args:
-            defect_type: Type of defect
-            severity: Severity level
+            images: PIL Images, one per prompt
+            prompts: Text prompts
+            max_new_tokens: Maximum number of generated tokens
 
         Returns:
-            Dictionary with explanation and recommended_action
-        """
-        explanations = {
-            "crack": {
-                "High": {
-                    "explanation": "Significant linear discontinuity detected in structural element. The crack extent suggests potential load path disruption or material fatigue. Location and propagation pattern indicate need for immediate structural assessment.",
-                    "recommended_action": "Conduct detailed structural evaluation including load capacity analysis. Consider temporary shoring if needed. Implement crack monitoring system and develop repair specifications with licensed structural engineer."
-                },
-                "Medium": {
-                    "explanation": "Moderate crack formation observed in structural component. The defect exhibits characteristics of early-stage material degradation or settlement-induced stress. Current extent suggests localized rather than systemic issue.",
-                    "recommended_action": "Install crack width monitoring gauges. Perform material testing to determine cause. Schedule repair using appropriate epoxy injection or routing and sealing within next maintenance cycle."
-                },
-                "Low": {
-                    "explanation": "Minor surface crack detected. Defect appears superficial with limited propagation. Likely caused by shrinkage, thermal stress, or minor settlement. No immediate structural concern evident.",
-                    "recommended_action": "Document crack location and dimensions. Apply surface sealant to prevent moisture ingress. Schedule for re-inspection in 6-12 months to monitor for progression."
-                }
-            },
-            "corrosion": {
-                "High": {
-                    "explanation": "Advanced corrosion detected with evidence of significant material loss. The deterioration pattern suggests prolonged exposure to corrosive environment. Potential for reduced load-bearing capacity and progressive structural degradation.",
-                    "recommended_action": "Immediate structural assessment required. Perform material thickness testing and load capacity evaluation. Implement corrosion protection system. Plan for member replacement or structural reinforcement as engineering analysis dictates."
-                },
-                "Medium": {
-                    "explanation": "Moderate corrosion identified on structural surface. Observable oxidation with partial material degradation. Current state indicates active corrosion process requiring intervention to prevent acceleration.",
-                    "recommended_action": "Remove corrosion products and assess remaining material thickness. Apply protective coating system per SSPC standards. Improve drainage or ventilation to eliminate moisture source. Monitor quarterly for progression."
-                },
-                "Low": {
-                    "explanation": "Surface-level corrosion detected with minimal material loss. Early-stage oxidation present, primarily affecting protective coating or superficial material layers. Structural integrity currently maintained.",
-                    "recommended_action": "Clean affected area and apply corrosion inhibitor. Restore protective coating system. Address moisture source if identified. Include in routine inspection schedule."
-                }
-            },
-            "spalling": {
-                "High": {
-                    "explanation": "Extensive concrete spalling with visible material loss detected. Defect severity suggests potential reinforcement exposure or advanced deterioration. Pattern indicates freeze-thaw damage, corrosion-induced pressure, or alkali-silica reaction.",
-                    "recommended_action": "Urgent engineering assessment required. Remove loose material and inspect for reinforcement corrosion. Perform concrete strength testing. Execute structural repair using compatible materials per ACI 546 guidelines. Address root cause of deterioration."
-                },
-                "Medium": {
-                    "explanation": "Moderate spalling observed with measurable concrete delamination. Surface layer failure evident, potentially due to reinforcement corrosion, freeze-thaw cycles, or construction defects. Underlying structure requires verification.",
-                    "recommended_action": "Remove delaminated concrete and assess extent of damage. Test for chloride content and carbonation depth. Repair using polymer-modified concrete or appropriate patching material. Implement preventive measures for underlying cause."
-                },
-                "Low": {
-                    "explanation": "Minor surface spalling detected affecting concrete cover. Limited material loss observed, likely due to localized impact, minor freeze-thaw action, or finishing issues. Structural reinforcement not compromised.",
-                    "recommended_action": "Remove loose material and clean surface. Apply concrete patching compound for affected areas. Seal surface to prevent moisture penetration. Monitor during regular inspections."
-                }
-            }
-        }
+            Generated text for each prompt, in order
+        """
+        # One batch at a time (shared model and tokenizer; CUDA graphs once compiled)
+        with self._generate_lock:
+            # Prepare inputs: preprocess images, reuse cached prompt tokens padded to a common length
+            inputs = self.processor.image_processor(images, return_tensors="pt")
+            inputs.update(self.processor.tokenizer.pad(
+                {"input_ids": [list(self._prompt_token_ids(prompt)) for prompt in prompts]},
+                padding=True,
+                return_tensors="pt"
+            ))
 
-        defect_type_lower = defect_type.lower()
+            # Cast pixels to the model dtype on the host, where it is cheap
+            inputs["pixel_values"] = inputs["pixel_values"].to(dtype=self.model.dtype)
 
-        if defect_type_lower in explanations and severity in explanations[defect_type_lower]:
-            return explanations[defect_type_lower][severity]
-        else:
-            return {
-                "explanation": f"{severity} severity {defect_type} detected requiring engineering assessment.",
-                "recommended_action": "Consult with licensed structural engineer for evaluation and repair recommendations."
-            }
+            # Move inputs to device; on CUDA stage through pinned memory so the copies are asynchronous
+            if self.device == "cuda":
+                for key, value in inputs.items():
+                    inputs[key] = value.pin_memory().to(self.device, non_blocking=True)
+            else:
+                inputs = inputs.to(self.device)
+
+            # Generate text (greedy decoding with KV cache; output length bounded independently of prompt)
+            with torch.inference_mode():
+                generated_ids = self.model.generate(
+                    **inputs,
+                    max_new_tokens=max_new_tokens,
+                    num_beams=1,
+                    do_sample=False,
+                    use_cache=True,
+                    pad_token_id=self.processor.tokenizer.eos_token_id
+                )
+
+            # Decode generated text
+            return self.processor.batch_decode(generated_ids, skip_special_tokens=True)
+
+
+@lru_cache(maxsize=1)
+def get_vlm(
+    model_name: str = "Salesforce/blip2-opt-2.7b",
+    device: str = None,
+    quantization: Optional[str] = None
+) -> VisionLanguageModel:
+    """
+    Return a shared VisionLanguageModel, loading the weights only once per process.
+
+    Args:
+        model_name: Hugging Face model identifier for BLIP-2
+        device: Device to run model on ('cuda', 'mps', or 'cpu')
+        quantization: bitsandbytes weight quantization on CUDA: 'int8', 'nf4', or None
+
+    Returns:
+        Loaded VisionLanguageModel
+    """
+    return VisionLanguageModel(model_name=model_name, device=device, quantization=quantization)
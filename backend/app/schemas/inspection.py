@@ -2,7 +2,7 @@
 Pydantic schemas for inspection API request and response models.
 """
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
 from typing import List, Literal
 
 
@@ -11,10 +11,11 @@ SeverityLevel = Literal["Low", "Medium", "High"]
 
 class BoundingBox(BaseModel):
     """Bounding box coordinates."""
-    x1: float = Field(..., description="Top-left x coordinate")
-    y1: float = Field(..., description="Top-left y coordinate")
-    x2: float = Field(..., description="Bottom-right x coordinate")
-    y2: float = Field(..., description="Bottom-right y coordinate")
+    # Built from detector output only, so skip lax (string) coercion
+    x1: float = Field(..., strict=True, description="Top-left x coordinate")
+    y1: float = Field(..., strict=True, description="Top-left y coordinate")
+    x2: float = Field(..., strict=True, description="Bottom-right x coordinate")
+    y2: float = Field(..., strict=True, description="Bottom-right y coordinate")
 
 
 class DefectDetection(BaseModel):
@@ -35,30 +36,36 @@ class InspectionResponse(BaseModel):
     total_defects: int = Field(..., description="Total number of defects detected")
     summary: str = Field(..., description="Overall inspection summary")
 
-    class Config:
-        json_schema_extra = {
-            "example": {
-                "status": "success",
-                "total_defects": 1,
-                "summary": "Inspection completed. 1 defect detected.",
-                "detections": [
-                    {
-                        "defect_type": "crack",
-                        "confidence": 0.89,
-                        "severity": "High",
-                        "severity_reasoning": "Long crack with significant extent",
-                        "bounding_box": {
-                            "x1": 120.5,
-                            "y1": 80.3,
-                            "x2": 450.2,
-                            "y2": 95.7
-                        },
-                        "explanation": "Significant linear discontinuity detected in structural element...",
-                        "recommended_action": "Conduct detailed structural evaluation including load capacity analysis..."
-                    }
-                ]
-            }
+    model_config = ConfigDict(json_schema_extra={
+        "example": {
+            "status": "success",
+            "total_defects": 1,
+            "summary": "Inspection completed. 1 defect detected.",
+            "detections": [
+                {
+                    "defect_type": "crack",
+                    "confidence": 0.89,
+                    "severity": "High",
+                    "severity_reasoning": "Long crack with significant extent",
+                    "bounding_box": {
+                        "x1": 120.5,
+                        "y1": 80.3,
+                        "x2": 450.2,
+                        "y2": 95.7
+                    },
+                    "explanation": "Significant linear discontinuity detected in structural element...",
+                    "recommended_action": "Conduct detailed structural evaluation including load capacity analysis..."
+                }
+            ]
         }
+    })
+
+
+class InspectionSummary(BaseModel):
+    """Final line of a streamed (NDJSON) inspection report."""
+    status: str = Field(default="success", description="Inspection status")
+    total_defects: int = Field(..., description="Total number of defects detected")
+    summary: str = Field(..., description="Overall inspection summary")
 
 
 class ErrorResponse(BaseModel):
@@ -66,3 +73,8 @@ class ErrorResponse(BaseModel):
     status: str = Field(default="error")
     message: str = Field(..., description="Error message")
     detail: str = Field(default="", description="Detailed error information")
+
+
+# Serializes responses directly in pydantic-core, bypassing FastAPI's response_model pass
+INSPECTION_RESPONSE_ADAPTER = TypeAdapter(InspectionResponse)
+BATCH_INSPECTION_RESPONSE_ADAPTER = TypeAdapter(List[InspectionResponse])
@@ -9,19 +9,35 @@ Pipeline:
 5. Structured Report Generation
 """
 
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Tuple, Union
 from PIL import Image
+import numpy as np
+import cv2
+from collections import Counter
+import asyncio
 import io
+import os
 
-from backend.app.models.detector import DefectDetector
+from backend.app.models.detector import DefectDetector, DetectionBatcher
 from backend.app.models.severity import SeverityAssessor
-from backend.app.models.vlm import VisionLanguageModel
+from backend.app.models.vlm import RuleBasedExplainer, get_vlm
 from backend.app.schemas.inspection import (
     InspectionResponse,
+    InspectionSummary,
     DefectDetection,
     BoundingBox
 )
 
+# Severity levels in summary order, most severe first
+SEVERITY_LEVELS = ("High", "Medium", "Low")
+
+# libjpeg-turbo via PyTurboJPEG is optional; OpenCV/Pillow are used without it
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, RuntimeError, OSError):
+    _turbo_jpeg = None
+
 
 class InspectionService:
     """
@@ -46,8 +62,13 @@ class InspectionService:
 
         # Initialize detector
         self.detector = DefectDetector(model_path=detector_model_path)
+        self.detection_batcher = DetectionBatcher(self.detector)
         print("✓ Defect detector loaded")
 
+        # Pay one-time inference costs before the first request
+        self.detector.warmup()
+        print("✓ Defect detector warmed up")
+
         # Initialize severity assessor
         self.severity_assessor = SeverityAssessor()
         print("✓ Severity assessor initialized")
@@ -55,15 +76,21 @@ class InspectionService:
         # Initialize VLM if requested
         self.use_vlm = use_vlm
         if use_vlm:
-            self.vlm = VisionLanguageModel(model_name=vlm_model_name)
+            self.vlm = get_vlm(vlm_model_name, quantization=os.getenv("VLM_QUANTIZATION") or None)
             print("✓ Vision-Language Model loaded")
         else:
-            self.vlm = VisionLanguageModel.__new__(VisionLanguageModel)
+            self.vlm = RuleBasedExplainer()
             print("✓ Using rule-based explanations (faster)")
 
         print("Inspection Service ready\n")
 
-    async def inspect_image(self, image_bytes: bytes) -> InspectionResponse:
+    async def aclose(self):
+        """
+        Release background resources at shutdown (stops the detection batcher).
+        """
+        await self.detection_batcher.aclose()
+
+    async def inspect_image(self, image_bytes: Union[bytes, memoryview]) -> InspectionResponse:
         """
         Perform complete inspection on an uploaded image.
 
@@ -73,90 +100,267 @@ class InspectionService:
         Returns:
             InspectionResponse with all detected defects and analysis
         """
-        # Load image
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        processed_detections = await self._analyze_image(image_bytes)
 
-        # Step 1: Detect defects
-        detections = self.detector.detect(image)
+        return InspectionResponse(
+            status="success",
+            detections=processed_detections,
+            total_defects=len(processed_detections),
+            summary=self._generate_summary(processed_detections)
+        )
 
-        if not detections:
-            return InspectionResponse(
-                status="success",
-                detections=[],
-                total_defects=0,
-                summary="Inspection completed. No defects detected."
-            )
+    async def inspect_image_stream(
+        self,
+        image_bytes: Union[bytes, memoryview]
+    ) -> AsyncIterator[Union[DefectDetection, InspectionSummary]]:
+        """
+        Perform complete inspection on an uploaded image, yielding results incrementally.
 
-        # Step 2-4: Process each detection
-        processed_detections = []
+        Decoding, detection and severity assessment finish before this returns,
+        so their errors are raised here rather than from the iterator. Detections
+        are then yielded as soon as their explanations are ready: with the VLM
+        enabled, after each batch of VLM_BATCH_SIZE defects.
 
-        for detection in detections:
-            processed = await self._process_detection(detection, image)
-            processed_detections.append(processed)
+        Args:
+            image_bytes: Raw image bytes from upload
 
-        # Generate summary
-        summary = self._generate_summary(processed_detections)
+        Returns:
+            Async iterator over each DefectDetection, followed by a final InspectionSummary
+        """
+        image, detections, assessments = await self._detect_and_assess(image_bytes)
+        return self._stream_explanations(image, detections, assessments)
 
-        return InspectionResponse(
+    async def _stream_explanations(
+        self,
+        image: np.ndarray,
+        detections: List[Dict[str, Any]],
+        assessments: List[Tuple[str, str]]
+    ) -> AsyncIterator[Union[DefectDetection, InspectionSummary]]:
+        """
+        Explain assessed detections in batches, yielding each batch as it completes.
+
+        Args:
+            image: Original BGR image array
+            detections: Raw detections from YOLOv8
+            assessments: (severity, reasoning) of each detection
+
+        Yields:
+            Each DefectDetection, followed by a final InspectionSummary
+        """
+        batch_size = self.vlm.max_batch_size if self.use_vlm else max(1, len(detections))
+        processed_detections = []
+
+        for start in range(0, len(detections), batch_size):
+            batch = await self._explain_detections(
+                detections[start:start + batch_size],
+                image,
+                assessments[start:start + batch_size]
+            )
+            processed_detections.extend(batch)
+            for detection in batch:
+                yield detection
+
+        yield InspectionSummary(
             status="success",
-            detections=processed_detections,
             total_defects=len(processed_detections),
-            summary=summary
+            summary=self._generate_summary(processed_detections)
         )
 
-    async def _process_detection(
+    async def _analyze_image(self, image_bytes: Union[bytes, memoryview]) -> List[DefectDetection]:
+        """
+        Run detection, severity assessment and explanation on an uploaded image.
+
+        Args:
+            image_bytes: Raw image bytes from upload
+
+        Returns:
+            Processed detections
+        """
+        image, detections, assessments = await self._detect_and_assess(image_bytes)
+
+        if not detections:
+            return []
+
+        return await self._explain_detections(detections, image, assessments)
+
+    async def _detect_and_assess(
+        self,
+        image_bytes: Union[bytes, memoryview]
+    ) -> Tuple[np.ndarray, List[Dict[str, Any]], List[Tuple[str, str]]]:
+        """
+        Decode an uploaded image, detect defects and assess their severity.
+
+        Args:
+            image_bytes: Raw image bytes from upload
+
+        Returns:
+            Tuple of (decoded BGR image, raw detections, (severity, reasoning) per detection)
+        """
+        # Load image in a worker thread so decoding does not block the event loop
+        image = await asyncio.to_thread(self._decode_image, image_bytes)
+
+        # Step 1: Detect defects (batched with concurrent requests)
+        detections = await self.detection_batcher.detect(image)
+
+        # Step 2: Assess severity of all detections at once
+        img_height, img_width = image.shape[:2]
+        assessments = self.severity_assessor.assess_batch(detections, img_width, img_height)
+
+        return image, detections, assessments
+
+    async def _explain_detections(
+        self,
+        detections: List[Dict[str, Any]],
+        image: np.ndarray,
+        assessments: List[Tuple[str, str]]
+    ) -> List[DefectDetection]:
+        """
+        Explain assessed detections and build their structured results.
+
+        Args:
+            detections: Raw detections from YOLOv8
+            image: Original BGR image array
+            assessments: (severity, reasoning) of each detection
+
+        Returns:
+            Processed detections
+        """
+        # Step 3: Generate explanations for the detections
+        explanations = await self._generate_explanations(
+            detections, image, [severity for severity, _ in assessments]
+        )
+
+        # Step 4: Build structured detections
+        return [
+            self._build_detection(detection, severity, severity_reasoning, explanation)
+            for detection, (severity, severity_reasoning), explanation
+            in zip(detections, assessments, explanations)
+        ]
+
+    async def inspect_images(
+        self,
+        images_bytes: List[Union[bytes, memoryview]]
+    ) -> List[InspectionResponse]:
+        """
+        Perform complete inspection on several uploaded images.
+
+        The images are inspected concurrently, so the detection batcher runs
+        them through the model together.
+
+        Args:
+            images_bytes: Raw image bytes of each upload
+
+        Returns:
+            One InspectionResponse per image, in input order
+        """
+        return await asyncio.gather(*(self.inspect_image(image_bytes) for image_bytes in images_bytes))
+
+    @staticmethod
+    def _decode_image(image_bytes: Union[bytes, memoryview]) -> np.ndarray:
+        """
+        Decode uploaded image bytes into a BGR image array.
+
+        JPEGs are decoded with libjpeg-turbo when PyTurboJPEG is installed;
+        other formats, and JPEGs it rejects, go through OpenCV, with Pillow
+        as a last resort.
+        EXIF orientation is ignored, matching the coordinates of the raw pixels.
+
+        Args:
+            image_bytes: Raw image bytes from upload
+
+        Returns:
+            Decoded (H, W, 3) uint8 image in BGR channel order
+        """
+        if _turbo_jpeg is not None and image_bytes[:2] == b"\xff\xd8":
+            try:
+                return _turbo_jpeg.decode(image_bytes, pixel_format=TJPF_BGR)
+            except OSError:
+                # e.g. CMYK JPEGs, which libjpeg-turbo cannot convert to BGR
+                pass
+
+        image = cv2.imdecode(
+            np.frombuffer(image_bytes, dtype=np.uint8),
+            cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+        )
+        if image is not None:
+            return image
+
+        # Formats OpenCV cannot read
+        rgb = np.asarray(Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR)
+
+    async def _generate_explanations(
+        self,
+        detections: List[Dict[str, Any]],
+        image: np.ndarray,
+        severities: List[str]
+    ) -> List[Dict[str, str]]:
+        """
+        Generate explanations and recommended actions for assessed detections.
+
+        With the VLM enabled, the defect crops go through batched generation
+        (VLM_BATCH_SIZE defects per call) in a worker thread so the event
+        loop stays responsive.
+
+        Args:
+            detections: Raw detections from YOLOv8
+            image: Original BGR image array
+            severities: Assessed severity level of each detection
+
+        Returns:
+            One dictionary with explanation and recommended_action per detection
+        """
+        defect_types = [detection["class_name"] for detection in detections]
+
+        if self.use_vlm:
+            # Crop defect regions for VLM (the processor expects RGB)
+            cropped_images = [
+                cv2.cvtColor(
+                    self.detector.crop_defect_region(image, detection["bbox"]),
+                    cv2.COLOR_BGR2RGB
+                )
+                for detection in detections
+            ]
+
+            # Generate VLM explanations
+            return await asyncio.to_thread(
+                self.vlm.generate_explanation_batch,
+                cropped_images,
+                defect_types,
+                severities
+            )
+
+        # Use rule-based explanation (faster, production-ready)
+        return [
+            self.vlm.generate_simple_explanation(defect_type=defect_type, severity=severity)
+            for defect_type, severity in zip(defect_types, severities)
+        ]
+
+    def _build_detection(
         self,
         detection: Dict[str, Any],
-        image: Image.Image
+        severity: str,
+        severity_reasoning: str,
+        explanation: Dict[str, str]
     ) -> DefectDetection:
         """
-        Process a single detection through severity assessment and explanation.
+        Combine a detection with its assessment and explanation.
 
         Args:
             detection: Raw detection from YOLOv8
-            image: Original image
+            severity: Assessed severity level
+            severity_reasoning: Reasoning for the severity level
+            explanation: Explanation and recommended_action for the defect
 
         Returns:
             Complete DefectDetection with all analysis
         """
-        defect_type = detection["class_name"]
         bbox = detection["bbox"]
-        confidence = detection["confidence"]
-
-        # Step 2: Assess severity
-        severity, severity_reasoning = self.severity_assessor.assess_severity(
-            defect_type=defect_type,
-            bbox=bbox,
-            image=image,
-            confidence=confidence
-        )
-
-        # Step 3: Generate explanation
-        if self.use_vlm:
-            # Crop defect region for VLM
-            cropped_image = self.detector.crop_defect_region(image, bbox)
-
-            # Generate VLM explanation
-            vlm_output = self.vlm.generate_explanation(
-                image=cropped_image,
-                defect_type=defect_type,
-                severity=severity
-            )
-            explanation = vlm_output["explanation"]
-            recommended_action = vlm_output["recommended_action"]
-        else:
-            # Use rule-based explanation (faster, production-ready)
-            simple_output = self.vlm.generate_simple_explanation(
-                defect_type=defect_type,
-                severity=severity
-            )
-            explanation = simple_output["explanation"]
-            recommended_action = simple_output["recommended_action"]
 
         # Create structured response
         return DefectDetection(
-            defect_type=defect_type,
-            confidence=round(confidence, 3),
+            defect_type=detection["class_name"],
+            confidence=round(detection["confidence"], 3),
             severity=severity,
             severity_reasoning=severity_reasoning,
             bounding_box=BoundingBox(
@@ -165,8 +369,8 @@ class InspectionService:
                 x2=bbox[2],
                 y2=bbox[3]
             ),
-            explanation=explanation,
-            recommended_action=recommended_action
+            explanation=explanation["explanation"],
+            recommended_action=explanation["recommended_action"]
         )
 
     def _generate_summary(self, detections: List[DefectDetection]) -> str:
@@ -184,14 +388,9 @@ class InspectionService:
         if total == 0:
             return "Inspection completed. No defects detected."
 
-        # Count by severity
-        severity_counts = {"High": 0, "Medium": 0, "Low": 0}
-        defect_counts = {}
-
-        for detection in detections:
-            severity_counts[detection.severity] += 1
-            defect_type = detection.defect_type.capitalize()
-            defect_counts[defect_type] = defect_counts.get(defect_type, 0) + 1
+        # Count by severity and defect type (first-seen order)
+        severity_counts = Counter(detection.severity for detection in detections)
+        defect_counts = Counter(detection.defect_type.capitalize() for detection in detections)
 
         # Build summary
         summary_parts = [f"Inspection completed. {total} defect{'s' if total > 1 else ''} detected."]
@@ -202,11 +401,8 @@ class InspectionService:
         summary_parts.append(f"Types: {', '.join(defect_list)}.")
 
         # Add severity breakdown
-        severity_list = []
-        for severity in ["High", "Medium", "Low"]:
-            count = severity_counts[severity]
-            if count > 0:
-                severity_list.append(f"{count} {severity}")
+        severity_list = [f"{severity_counts[severity]} {severity}"
+                         for severity in SEVERITY_LEVELS if severity_counts[severity] > 0]
 
         if severity_list:
             summary_parts.append(f"Severity: {', '.join(severity_list)}.")
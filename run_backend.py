@@ -2,8 +2,12 @@
 """
 Simple backend server runner script.
 Starts the FastAPI application on http://localhost:8000
+
+Runs a single auto-reloading process by default; pass --prod for
+multiple workers with uvloop/httptools and no file watcher.
 """
 
+import argparse
 import uvicorn
 import sys
 import os
@@ -13,6 +17,13 @@ project_root = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, project_root)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the inspection backend")
+    parser.add_argument("--prod", action="store_true",
+                        help="Production mode: multiple workers, no auto-reload")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes in --prod mode (default: $WORKERS or 4)")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("Infrastructure Inspection System - Backend")
     print("=" * 60)
@@ -21,10 +32,22 @@ if __name__ == "__main__":
     print("Documentation at: http://localhost:8000/docs")
     print("\nPress Ctrl+C to stop\n")
 
-    uvicorn.run(
-        "backend.app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
+    if args.prod:
+        # Each worker loads its own models, so memory scales with the worker count
+        uvicorn.run(
+            "backend.app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=args.workers or int(os.getenv("WORKERS", "4")),
+            loop="uvloop",
+            http="httptools",
+            log_level="warning"
+        )
+    else:
+        uvicorn.run(
+            "backend.app.main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True,
+            log_level="info"
+        )
@@ -1,86 +1,557 @@
 """
 Simple test client for Infrastructure Inspection API.
 Demonstrates how to use the API programmatically.
+
+Usage:
+    python3 test_api.py [--batch | --stream | --raw | --check] [image_path ...]
+
+Images given on the command line are inspected concurrently, in a
+single /api/inspect_batch request with --batch, through the NDJSON
+/api/inspect_stream endpoint with --stream, or as chunked raw bodies
+to /api/inspect_raw with --raw. --check verifies that each image gets
+the same detections alone as when batched with the others.
 """
 
-import requests
-import json
+import argparse
+import asyncio
+import aiohttp
+import ijson
+import io
+import orjson
+import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+# uvloop (installed with uvicorn[standard]) runs the client on libuv when available
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# API endpoints
+BASE_URL = "http://localhost:8000"
+HEALTH_URL = f"{BASE_URL}/api/health"
+INSPECT_URL = f"{BASE_URL}/api/inspect"
+INSPECT_BATCH_URL = f"{BASE_URL}/api/inspect_batch"
+INSPECT_STREAM_URL = f"{BASE_URL}/api/inspect_stream"
+INSPECT_RAW_URL = f"{BASE_URL}/api/inspect_raw"
+
+JPEG_MIME = "image/jpeg"
+
+# Headers sent with every request (reports are gzip-compressed by the server)
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip"}
+
+# Streamed reports are requested uncompressed so no layer holds back partial lines
+STREAM_HEADERS = {
+    "Accept": "application/x-ndjson",
+    "Accept-Encoding": "identity",
+    "X-Accel-Buffering": "no"
+}
+
+# Fail fast on unreachable servers; allow slow inference but not a stalled socket
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=3, sock_read=120)
+HEALTH_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+
+# Chunk size for raw uploads from producers of unknown length
+RAW_CHUNK_SIZE = 64 * 1024
+
+# Maximum concurrent inspection requests
+MAX_IN_FLIGHT = 32
+
+# Retries for uploads that fail to connect or hit a gateway error, with exponential backoff
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+RETRY_STATUSES = {502, 503, 504}
+
+
+def run_event_loop(coro):
+    """
+    Run a coroutine to completion, on uvloop when it is installed.
+
+    Args:
+        coro: Coroutine to run
+    """
+    if uvloop is None:
+        return asyncio.run(coro)
+    if hasattr(uvloop, "run"):
+        # uvloop >= 0.18
+        return uvloop.run(coro)
+    uvloop.install()
+    return asyncio.run(coro)
+
+
+async def test_health_check(session: aiohttp.ClientSession):
+    """
+    Test the health check endpoint.
 
-def test_health_check():
-    """Test the health check endpoint."""
+    Args:
+        session: Shared HTTP client session
+    """
     print("Testing health check endpoint...")
-    response = requests.get("http://localhost:8000/api/health")
-    print(f"Status: {response.status_code}")
-    print(f"Response: {json.dumps(response.json(), indent=2)}\n")
+    async with session.get(HEALTH_URL, timeout=HEALTH_TIMEOUT) as response:
+        print(f"Status: {response.status}")
+        body = await response.json(loads=orjson.loads)
+        print(f"Response: {orjson.dumps(body, option=orjson.OPT_INDENT_2).decode()}\n")
+
+
+async def limited(semaphore: asyncio.Semaphore, coro):
+    """Await a coroutine while holding a semaphore slot."""
+    async with semaphore:
+        return await coro
+
+
+@asynccontextmanager
+async def post_images(
+    session: aiohttp.ClientSession,
+    url: str,
+    field: str,
+    images: list,
+    headers: dict = None
+):
+    """
+    POST images as multipart form data, retrying transient failures.
+
+    The image bytes are read by the caller once and reused for every
+    attempt; only the form wrapper is rebuilt.
+
+    Args:
+        session: Shared HTTP client session
+        url: Endpoint URL
+        field: Form field name for the images
+        images: (filename, bytes) pairs
+        headers: Extra request headers
+
+    Yields:
+        The final response
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        form = aiohttp.FormData()
+        for filename, payload in images:
+            form.add_field(field, payload, filename=filename, content_type=JPEG_MIME)
+
+        try:
+            response = await session.post(url, data=form, headers=headers)
+        except aiohttp.ClientConnectorError:
+            # Only failures to connect are retried; a read timeout means the
+            # server may still be running inference, so it is not re-sent
+            if attempt == MAX_RETRIES:
+                raise
+        else:
+            if response.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                try:
+                    yield response
+                finally:
+                    response.release()
+                return
+            response.release()
+
+        await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
 
 
-def test_inspection(image_path: str):
+async def test_inspection(session: aiohttp.ClientSession, image_path: str):
     """
     Test the inspection endpoint with an image.
 
     Args:
+        session: Shared HTTP client session
         image_path: Path to the image file to inspect
     """
     print(f"Testing inspection with image: {image_path}")
 
-    if not Path(image_path).exists():
+    path = Path(image_path)
+    if not path.exists():
+        print(f"Error: Image not found at {image_path}")
+        return
+
+    # Read the file once so retries do not go back to disk; the file handle
+    # is closed before the request starts
+    images = [(path.name, await asyncio.to_thread(path.read_bytes))]
+
+    # Make request
+    async with post_images(session, INSPECT_URL, "file", images) as response:
+        print(f"Status: {response.status} ({image_path})")
+
+        if response.status == 200:
+            await print_report(response.content, image_path)
+        else:
+            print(f"Error: {await response.text()}")
+
+
+async def test_inspection_stream(session: aiohttp.ClientSession, image_path: str):
+    """
+    Test the streaming inspection endpoint, printing each detection as its line arrives.
+
+    Blocks of concurrently streamed reports can interleave, so every line
+    is prefixed with the image path.
+
+    Args:
+        session: Shared HTTP client session
+        image_path: Path to the image file to inspect
+    """
+    print(f"Testing streaming inspection with image: {image_path}")
+
+    path = Path(image_path)
+    if not path.exists():
         print(f"Error: Image not found at {image_path}")
         return
 
-    # Prepare the file
-    with open(image_path, "rb") as f:
-        files = {"file": (Path(image_path).name, f, "image/jpeg")}
-
-        # Make request
-        response = requests.post(
-            "http://localhost:8000/api/inspect",
-            files=files
-        )
-
-    print(f"Status: {response.status_code}")
-
-    if response.status_code == 200:
-        result = response.json()
-        print("\n" + "=" * 60)
-        print("INSPECTION REPORT")
-        print("=" * 60)
-        print(f"\nStatus: {result['status']}")
-        print(f"Total Defects: {result['total_defects']}")
-        print(f"Summary: {result['summary']}\n")
-
-        if result['detections']:
-            for i, detection in enumerate(result['detections'], 1):
-                print(f"\n--- Defect {i} ---")
-                print(f"Type: {detection['defect_type'].upper()}")
-                print(f"Severity: {detection['severity']}")
-                print(f"Confidence: {detection['confidence']:.2%}")
-                print(f"Location: ({detection['bounding_box']['x1']:.0f}, {detection['bounding_box']['y1']:.0f}) to "
-                      f"({detection['bounding_box']['x2']:.0f}, {detection['bounding_box']['y2']:.0f})")
-                print(f"\nAnalysis: {detection['explanation']}")
-                print(f"\nRecommended Action: {detection['recommended_action']}")
-        print("\n" + "=" * 60)
+    images = [(path.name, await asyncio.to_thread(path.read_bytes))]
+
+    # Make request
+    async with post_images(
+        session, INSPECT_STREAM_URL, "file", images, headers=STREAM_HEADERS
+    ) as response:
+        print(f"Status: {response.status} ({image_path})")
+
+        if response.status != 200:
+            print(f"Error: {await response.text()}")
+            return
+
+        await emit(write_labelled, image_path, write_report_header)
+        count = 0
+
+        # One JSON object per line: detections, then the summary (or an error)
+        async for line in response.content:
+            item = orjson.loads(line)
+            if "defect_type" in item:
+                count += 1
+                await emit(write_labelled, image_path, write_detection, count, item)
+            else:
+                await emit(write_labelled, image_path, write_report_footer, item)
+
+
+async def read_chunks(path: Path):
+    """
+    Yield a file in chunks as it is read, like a camera or other live producer.
+
+    Args:
+        path: File to read
+
+    Yields:
+        Chunks of at most RAW_CHUNK_SIZE bytes
+    """
+    with path.open("rb") as f:
+        while chunk := await asyncio.to_thread(f.read, RAW_CHUNK_SIZE):
+            yield chunk
+
+
+async def test_inspection_raw(session: aiohttp.ClientSession, image_path: str):
+    """
+    Test the raw-body inspection endpoint with a chunked upload of unknown length.
+
+    Args:
+        session: Shared HTTP client session
+        image_path: Path to the image file to inspect
+    """
+    print(f"Testing raw chunked inspection with image: {image_path}")
+
+    path = Path(image_path)
+    if not path.exists():
+        print(f"Error: Image not found at {image_path}")
+        return
+
+    # An async generator body is sent with Transfer-Encoding: chunked (no Content-Length);
+    # it can only be consumed once, so this path is not retried
+    async with session.post(
+        INSPECT_RAW_URL, data=read_chunks(path), headers={"Content-Type": JPEG_MIME}
+    ) as response:
+        print(f"Status: {response.status} ({image_path})")
+
+        if response.status == 200:
+            await print_report(response.content, image_path)
+        else:
+            print(f"Error: {await response.text()}")
+
+
+async def test_inspection_batch(session: aiohttp.ClientSession, image_paths: list):
+    """
+    Test the batch inspection endpoint with several images in one request.
+
+    Args:
+        session: Shared HTTP client session
+        image_paths: Paths to the image files to inspect
+    """
+    print(f"Testing batch inspection with {len(image_paths)} images")
+
+    paths = [Path(image_path) for image_path in image_paths]
+    missing = [str(path) for path in paths if not path.exists()]
+    if missing:
+        print(f"Error: Images not found: {', '.join(missing)}")
+        return
+
+    # One multipart body with a repeated "files" field
+    contents = await asyncio.gather(*(asyncio.to_thread(path.read_bytes) for path in paths))
+    images = [(path.name, content) for path, content in zip(paths, contents)]
+
+    # Make request
+    async with post_images(session, INSPECT_BATCH_URL, "files", images) as response:
+        print(f"Status: {response.status}")
+
+        if response.status == 200:
+            # Reports arrive in upload order; print each once it is fully received
+            index = 0
+            async for result in ijson.items_async(response.content, "item"):
+                await emit(write_full_report, image_paths[index], result)
+                index += 1
+        else:
+            print(f"Error: {await response.text()}")
+
+
+async def test_batch_consistency(session: aiohttp.ClientSession, image_paths: list):
+    """
+    Check that batching does not change results: each image is inspected
+    alone, one request at a time, then all together in one batch request,
+    and the detections are compared.
+
+    Args:
+        session: Shared HTTP client session
+        image_paths: Paths to the image files to inspect
+    """
+    print(f"Checking batch consistency of {len(image_paths)} images")
+
+    paths = [Path(image_path) for image_path in image_paths]
+    missing = [str(path) for path in paths if not path.exists()]
+    if missing:
+        print(f"Error: Images not found: {', '.join(missing)}")
+        return
+
+    contents = await asyncio.gather(*(asyncio.to_thread(path.read_bytes) for path in paths))
+    images = [(path.name, content) for path, content in zip(paths, contents)]
+
+    # Sequential requests, so no other image shares the detector batch
+    single_results = []
+    for image in images:
+        async with post_images(session, INSPECT_URL, "file", [image]) as response:
+            if response.status != 200:
+                print(f"Error: {await response.text()}")
+                return
+            single_results.append(await response.json(loads=orjson.loads))
+
+    async with post_images(session, INSPECT_BATCH_URL, "files", images) as response:
+        if response.status != 200:
+            print(f"Error: {await response.text()}")
+            return
+        batch_results = await response.json(loads=orjson.loads)
+
+    mismatches = 0
+    for image_path, single, batched in zip(image_paths, single_results, batch_results):
+        if single["detections"] == batched["detections"]:
+            print(f"✓ {image_path}: {single['total_defects']} defects, alone and batched")
+        else:
+            mismatches += 1
+            print(f"✗ {image_path}: {single['total_defects']} defects alone, "
+                  f"{batched['total_defects']} batched")
+
+    print(f"\n{'All results match' if not mismatches else f'{mismatches} mismatched'}\n")
+
+
+def write_report_header(out: io.StringIO):
+    """Write the heading of an inspection report."""
+    out.write("\n" + "=" * 60 + "\n")
+    out.write("INSPECTION REPORT\n")
+    out.write("=" * 60 + "\n")
+
+
+def write_report_footer(out: io.StringIO, fields: dict):
+    """
+    Write the overall status and summary of an inspection report.
+
+    Args:
+        out: Buffer to write to
+        fields: Report fields (status, total_defects, summary), or an
+            error line (status, message, detail) from a failed stream
+    """
+    out.write(f"\nStatus: {fields.get('status')}\n")
+    if fields.get("status") == "error":
+        out.write(f"Error: {fields.get('message')}\n")
+        out.write(f"Detail: {fields.get('detail')}\n")
     else:
-        print(f"Error: {response.text}")
+        out.write(f"Total Defects: {fields.get('total_defects')}\n")
+        out.write(f"Summary: {fields.get('summary')}\n")
+    out.write("\n" + "=" * 60 + "\n")
+
+
+def write_detection(out: io.StringIO, i: int, detection: dict):
+    """
+    Write a single detection of an inspection report.
+
+    Args:
+        out: Buffer to write to
+        i: 1-based detection number
+        detection: Parsed DefectDetection JSON
+    """
+    bbox = detection['bounding_box']
+    out.write(f"\n--- Defect {i} ---\n")
+    out.write(f"Type: {detection['defect_type'].upper()}\n")
+    out.write(f"Severity: {detection['severity']}\n")
+    out.write(f"Confidence: {detection['confidence']:.2%}\n")
+    out.write(f"Location: ({bbox['x1']:.0f}, {bbox['y1']:.0f}) to "
+              f"({bbox['x2']:.0f}, {bbox['y2']:.0f})\n")
+    out.write(f"\nAnalysis: {detection['explanation']}\n")
+    out.write(f"\nRecommended Action: {detection['recommended_action']}\n")
+
+
+def write_full_report(out: io.StringIO, image_path: str, result: dict):
+    """
+    Write a complete inspection report, labelled with its image.
 
+    Args:
+        out: Buffer to write to
+        image_path: Image the report belongs to
+        result: Parsed InspectionResponse JSON
+    """
+    out.write(f"\n{image_path}\n")
+    write_report_header(out)
+    for i, detection in enumerate(result["detections"], 1):
+        write_detection(out, i, detection)
+    write_report_footer(out, result)
+
+
+def write_labelled(out: io.StringIO, label: str, write, *args):
+    """
+    Write a report block with every line prefixed by a label.
 
-def main():
-    """Main test function."""
+    Args:
+        out: Buffer to write to
+        label: Prefix for each line (e.g. the image path)
+        write: One of the write_* functions
+        *args: Arguments after the buffer
+    """
+    block = io.StringIO()
+    write(block, *args)
+    for line in block.getvalue().splitlines(keepends=True):
+        out.write(f"[{label}] {line}" if line.strip() else line)
+
+
+def render(write, *args):
+    """
+    Render report text into a buffer and write it to stdout in one call.
+
+    Args:
+        write: One of the write_* functions
+        *args: Arguments after the buffer
+    """
+    out = io.StringIO()
+    write(out, *args)
+    sys.stdout.write(out.getvalue())
+
+
+async def emit(write, *args):
+    """
+    Render and print report text in a worker thread so formatting and a
+    slow stdout (pipe, terminal) do not stall the event loop.
+
+    Each call prints as a single write, so callers emit a whole report at
+    once to keep concurrent reports from interleaving.
+
+    Args:
+        write: One of the write_* functions
+        *args: Arguments after the buffer
+    """
+    await asyncio.to_thread(render, write, *args)
+
+
+async def print_report(content: aiohttp.StreamReader, image_path: str):
+    """
+    Parse an inspection report while it is being received, then print it.
+
+    Detections are parsed one at a time as their bytes arrive, so the raw
+    response body is never buffered; the report is printed in one piece
+    once complete.
+
+    Args:
+        content: Response body stream of an InspectionResponse
+        image_path: Image the report belongs to
+    """
+    fields = {}
+    detections = []
+    builder = None
+
+    async for prefix, event, value in ijson.parse_async(content):
+        if prefix == "detections.item":
+            if event == "start_map":
+                builder = ijson.ObjectBuilder()
+            builder.event(event, value)
+            if event == "end_map":
+                detections.append(builder.value)
+                builder = None
+        elif builder is not None:
+            builder.event(event, value)
+        elif prefix in ("status", "total_defects", "summary"):
+            fields[prefix] = value
+
+    await emit(write_full_report, image_path, {**fields, "detections": detections})
+
+
+async def main(
+    image_paths: list,
+    batch: bool = False,
+    stream: bool = False,
+    raw: bool = False,
+    check: bool = False
+):
+    """
+    Main test function.
+
+    Args:
+        image_paths: Images to inspect
+        batch: Send all images in one batch request instead of one request each
+        stream: Use the NDJSON streaming endpoint
+        raw: Send each image as a chunked raw request body
+        check: Compare each image's results alone and batched instead of printing reports
+    """
     print("\n" + "=" * 60)
     print("Infrastructure Inspection API Test Client")
     print("=" * 60 + "\n")
 
-    # Test 1: Health check
-    test_health_check()
+    # One session and connection pool shared by all requests
+    connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+    # aiohttp decompresses gzip responses as they stream in
+    async with aiohttp.ClientSession(
+        connector=connector, headers=DEFAULT_HEADERS, timeout=REQUEST_TIMEOUT
+    ) as session:
+        # Test 1: Health check
+        await test_health_check(session)
 
-    # Test 2: Inspection (you need to provide an image path)
-    # Uncomment and modify the path to test with a real image
-    # test_inspection("data/sample_crack.jpg")
-
-    print("\nTo test image inspection, uncomment the test_inspection() call")
-    print("and provide a path to an infrastructure image.\n")
+        # Test 2: Inspection of every image
+        if image_paths and check:
+            await test_batch_consistency(session, image_paths)
+        elif image_paths and batch:
+            await test_inspection_batch(session, image_paths)
+        elif image_paths:
+            # One request per image, overlapping server-side latency; each report
+            # is handled as soon as its response lands, and one failure does not
+            # hide the others
+            semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+            if stream:
+                inspect = test_inspection_stream
+            elif raw:
+                inspect = test_inspection_raw
+            else:
+                inspect = test_inspection
+            tasks = [limited(semaphore, inspect(session, path)) for path in image_paths]
+            for task in asyncio.as_completed(tasks):
+                try:
+                    await task
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"Request failed: {e!r}")
+        else:
+            print("\nTo test image inspection, pass one or more image paths:")
+            print("python3 test_api.py data/sample_crack.jpg\n")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Infrastructure Inspection API test client")
+    parser.add_argument("images", nargs="*", help="Image files to inspect")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true",
+                      help="Send all images in one /api/inspect_batch request")
+    mode.add_argument("--stream", action="store_true",
+                      help="Stream each report as NDJSON from /api/inspect_stream")
+    mode.add_argument("--raw", action="store_true",
+                      help="Send each image as a chunked raw body to /api/inspect_raw")
+    mode.add_argument("--check", action="store_true",
+                      help="Check that each image gets the same detections alone and batched")
+    args = parser.parse_args()
+
+    run_event_loop(main(args.images, args.batch, args.stream, args.raw, args.check))